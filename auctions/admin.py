@@ -1,7 +1,56 @@
-from django.contrib import admin
-from .models import Bid, User, Listing, Category
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.functional import cached_property
+from .invalidation import LISTING, bump
+from .models import Bid, User, Listing, Category, RequestProfile, ShillSuspect
 from django.contrib.auth.admin import UserAdmin
 
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables: an unfiltered changelist uses a cheap
+    row estimate instead of a full COUNT(*). Filtered querysets still get an
+    exact count, which the indexed list_filters keep fast. The default
+    manager's own filter (e.g. hiding soft-deleted rows) does not count as
+    filtering.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if is_unfiltered(self.object_list):
+            estimate = estimate_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate > self.exact_count_threshold:
+                return estimate
+        return super().count
+
+
+def is_unfiltered(queryset):
+    query = getattr(queryset, 'query', None)
+    if query is None:
+        return False
+    return not query.where or query.where == queryset.model._default_manager.all().query.where
+
+
+def estimate_row_count(model, using='default'):
+    """Return an approximate row count for ``model``'s table, or None."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] > 0 else None
+    # Other backends: the largest primary key is read straight off the index
+    # and is a close upper bound for append-mostly tables.
+    return model._base_manager.using(using).aggregate(estimate=Max('pk'))['estimate']
+
+
 # Register your models here.
 class CustomUserAdmin(UserAdmin):
     list_display = ('email', 'first_name', 'last_name', 'username', 'date_joined', 'is_active')
@@ -9,8 +58,117 @@ class CustomUserAdmin(UserAdmin):
     filter_horizontal = ()
     list_filter = ()
     fieldsets = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+    ordering = ('name',)
+
+
+@admin.register(Listing)
+class ListingAdmin(admin.ModelAdmin):
+    list_display = ('title', 'owner', 'category', 'current_price', 'is_active', 'is_deleted', 'winner', 'created_date', 'end_date')
+    list_select_related = ('owner', 'category', 'winner')
+    list_filter = ('is_active', 'is_deleted', 'category')
+    search_fields = ('title',)
+    ordering = ('-created_date',)
+    raw_id_fields = ('owner', 'winner', 'watchlist')
+    autocomplete_fields = ('category',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('close_auctions', 'reopen_auctions')
+
+    def get_queryset(self, request):
+        # Soft-deleted listings stay visible here, so the purge queue can be inspected
+        queryset = Listing.all_objects.all()
+        ordering = self.get_ordering(request)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    @admin.action(description="Close selected auctions")
+    def close_auctions(self, request, queryset):
+        highest_bidder = Bid.objects.filter(listing=OuterRef('pk')).order_by('-amount').values('user')[:1]
+        with transaction.atomic():
+            updated = queryset.filter(is_active=True).update(is_active=False, winner=Subquery(highest_bidder))
+            bump(LISTING)
+        self.message_user(request, f"Closed {updated} auction(s).", messages.SUCCESS)
+
+    @admin.action(description="Reopen selected auctions")
+    def reopen_auctions(self, request, queryset):
+        with transaction.atomic():
+            updated = queryset.filter(is_active=False).update(is_active=True, winner=None)
+            bump(LISTING)
+        self.message_user(request, f"Reopened {updated} auction(s).", messages.SUCCESS)
+
+
+@admin.register(Bid)
+class BidAdmin(admin.ModelAdmin):
+    list_display = ('id', 'listing', 'user', 'amount', 'bid_time')
+    list_select_related = ('listing', 'user')
+    raw_id_fields = ('listing', 'user')
+    search_fields = ('listing__title',)
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_date', 'method', 'path', 'url_name', 'status_code', 'total_ms', 'view_ms', 'template_ms', 'sql_ms', 'sql_count', 'user')
+    list_select_related = ('user',)
+    list_filter = ('url_name',)
+    search_fields = ('path',)
+    readonly_fields = ('flamegraph_link',) + tuple(field.name for field in RequestProfile._meta.fields)
+    fields = readonly_fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path('<int:profile_id>/folded/', self.admin_site.admin_view(self.folded_view), name='auctions_requestprofile_folded'),
+        ]
+        return urls + super().get_urls()
+
+    def folded_view(self, request, profile_id):
+        profile = get_object_or_404(RequestProfile, pk=profile_id)
+        response = HttpResponse(profile.folded_stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.folded"'
+        return response
+
+    @admin.display(description="Flamegraph")
+    def flamegraph_link(self, obj):
+        url = reverse('admin:auctions_requestprofile_folded', args=[obj.pk])
+        return format_html('<a href="{}">Download collapsed stacks</a> (open with speedscope or flamegraph.pl)', url)
+
+
+@admin.register(ShillSuspect)
+class ShillSuspectAdmin(admin.ModelAdmin):
+    list_display = ('user', 'score', 'status', 'top_seller', 'listing_count', 'bid_count', 'won_count', 'updated')
+    list_select_related = ('user', 'top_seller')
+    list_filter = ('status',)
+    search_fields = ('user__username', 'top_seller__username')
+    ordering = ('-score',)
+    fields = ('user', 'status', 'score', 'reasons', 'top_seller', 'bid_count', 'listing_count', 'won_count',
+              'seller_concentration', 'seller_dominance', 'tiny_increment_share', 'first_flagged', 'updated')
+    readonly_fields = tuple(name for name in fields if name != 'status')
+    actions = ('mark_cleared', 'mark_confirmed')
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Mark selected accounts as cleared")
+    def mark_cleared(self, request, queryset):
+        updated = queryset.update(status='cleared')
+        self.message_user(request, f"Cleared {updated} account(s).", messages.SUCCESS)
+
+    @admin.action(description="Mark selected accounts as confirmed shills")
+    def mark_confirmed(self, request, queryset):
+        updated = queryset.update(status='confirmed')
+        self.message_user(request, f"Confirmed {updated} account(s).", messages.SUCCESS)
+
 
 admin.site.register(User, CustomUserAdmin),
-admin.site.register(Listing),
-admin.site.register(Category),
-admin.site.register(Bid),
\ No newline at end of file
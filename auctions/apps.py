@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class AuctionsConfig(AppConfig):
     name = 'auctions'
+
+    def ready(self):
+        from . import invalidation, ratelimit
+        invalidation.connect_signals()
+        ratelimit.connect_signals()
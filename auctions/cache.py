@@ -0,0 +1,69 @@
+"""
+File-based cache for state that several worker processes update together.
+
+Django's FileBasedCache implements ``add`` and ``incr`` as a read followed by
+a write, and lists the whole cache directory on every ``set`` to decide
+whether to cull. LockedFileBasedCache takes an exclusive lock on one file in
+the cache directory around those updates, so ``add``, ``incr`` and any
+read-modify-write done inside ``lock()`` are atomic across processes. It
+counts entries only every CULL_CHECK_INTERVAL writes, and drops expired
+entries before it culls live ones.
+"""
+import os
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+CULL_CHECK_INTERVAL = 100
+LOCK_NAME = '.lock'
+
+
+class LockedFileBasedCache(FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._lock_file = None
+        self._lock_depth = 0
+        self._writes = 0
+
+    @contextmanager
+    def lock(self):
+        """Hold the cache-wide write lock. Nested uses share the outer lock."""
+        if self._lock_depth == 0:
+            self._createdir()
+            self._lock_file = open(os.path.join(self._dir, LOCK_NAME), 'ab')
+            locks.lock(self._lock_file, locks.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                locks.unlock(self._lock_file)
+                self._lock_file.close()
+                self._lock_file = None
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.lock():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.lock():
+            return super().incr(key, delta, version)
+
+    def _cull(self):
+        self._writes += 1
+        if self._writes % CULL_CHECK_INTERVAL:
+            return
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for fname in filelist:
+            try:
+                with open(fname, 'rb') as f:
+                    self._is_expired(f)  # Deletes the file once it has expired
+            except FileNotFoundError:
+                pass
+        super()._cull()
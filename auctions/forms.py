@@ -1,7 +1,18 @@
 from decimal import Decimal
 from django import forms
+from django.db.models import Count, Q
+from django.utils import timezone
 from .models import Listing, Category
 
+
+def use_loaded_categories(field, categories):
+    """Render a category select from an already loaded list instead of querying per render."""
+    choices = [(category.pk, category.name) for category in categories]
+    if field.empty_label is not None:
+        choices.insert(0, ('', field.empty_label))
+    field.choices = choices
+
+
 class ListingForm(forms.ModelForm):
     class Meta:
         model = Listing
@@ -14,12 +25,20 @@ class ListingForm(forms.ModelForm):
             'category': forms.Select(attrs={'class': 'form-control'}),
         }
     
+    def __init__(self, *args, categories=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if categories is not None:
+            use_loaded_categories(self.fields['category'], categories)
+    
     def clean_title(self):
         title = self.cleaned_data.get('title')
         if len(title) < 3:
             raise forms.ValidationError("Title must be at least 3 characters long.")
         if len(title) > 200:
             raise forms.ValidationError("Title cannot exceed 200 characters.")
+        # Deleted listings keep their title until they are purged
+        if Listing.all_objects.filter(title=title, is_deleted=True).exists():
+            raise forms.ValidationError("A listing with this title was recently deleted. Please choose another title.")
         return title
     
     def clean_price(self):
@@ -101,4 +120,129 @@ class BidForm(forms.Form):
                 f"Bid must be at least ${min_increment:.2f} higher than the current price."
             )
         
-        return amount
\ No newline at end of file
+        return amount
+
+
+class ListingFilterForm(forms.Form):
+    """Filters and sort order for the listing feed, read from the query string."""
+    SORT_ORDERS = {
+        'newest': ('-created_date', '-id'),
+        'price_asc': ('current_price', 'id'),
+        'price_desc': ('-current_price', '-id'),
+        'most_bids': ('-bid_count', '-id'),
+        'ending_soon': ('end_date', 'id'),
+    }
+    # (label, lower bound, upper bound) for the price facet; upper bound exclusive
+    PRICE_BUCKETS = (
+        ('Under $25', None, Decimal('25')),
+        ('$25 - $50', Decimal('25'), Decimal('50')),
+        ('$50 - $100', Decimal('50'), Decimal('100')),
+        ('$100 - $250', Decimal('100'), Decimal('250')),
+        ('$250 - $500', Decimal('250'), Decimal('500')),
+        ('$500 and up', Decimal('500'), None),
+    )
+    PAGE_SIZES = (10, 25, 50)
+    
+    category = forms.ModelChoiceField(queryset=Category.objects.all(), required=False, empty_label="All categories",
+                                      widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    min_price = forms.DecimalField(required=False, min_value=0, decimal_places=2,
+                                   widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'placeholder': 'Min $'}))
+    max_price = forms.DecimalField(required=False, min_value=0, decimal_places=2,
+                                   widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'placeholder': 'Max $'}))
+    status = forms.ChoiceField(required=False, choices=[('', 'Active and closed'), ('active', 'Active'), ('closed', 'Closed')],
+                               widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    has_image = forms.BooleanField(required=False, label="With image only")
+    ending_before = forms.DateTimeField(required=False,
+                                        widget=forms.DateTimeInput(attrs={'class': 'form-control form-control-sm', 'type': 'datetime-local'}))
+    sort = forms.ChoiceField(required=False, choices=[
+        ('newest', 'Newest first'),
+        ('price_asc', 'Price: low to high'),
+        ('price_desc', 'Price: high to low'),
+        ('most_bids', 'Most bids'),
+        ('ending_soon', 'Ending soonest'),
+    ], widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    per_page = forms.TypedChoiceField(required=False, coerce=int, empty_value=10,
+                                      choices=[(size, f"{size} per page") for size in PAGE_SIZES],
+                                      widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    
+    def __init__(self, *args, fixed_category=None, categories=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fixed_category = fixed_category
+        self.categories = categories
+        if fixed_category is not None:
+            del self.fields['category']
+        elif categories is not None:
+            use_loaded_categories(self.fields['category'], categories)
+    
+    def get_value(self, name):
+        """Cleaned value of one filter; an invalid field falls back to its initial value."""
+        if not self.is_bound:
+            return None
+        self.is_valid()
+        if name in self.errors:
+            return self.get_initial_for_field(self.fields[name], name)
+        return self.cleaned_data.get(name)
+    
+    def category_q(self):
+        category = self.fixed_category or self.get_value('category')
+        return Q(category=category) if category is not None else Q()
+    
+    def price_q(self):
+        condition = Q()
+        if self.get_value('min_price') is not None:
+            condition &= Q(current_price__gte=self.get_value('min_price'))
+        if self.get_value('max_price') is not None:
+            condition &= Q(current_price__lte=self.get_value('max_price'))
+        return condition
+    
+    def filter_queryset(self, listings, with_facets=True):
+        """
+        Apply the filters. With ``with_facets=False`` the category and price
+        filters are left out, which is the base the facet counts run over.
+        """
+        if with_facets:
+            listings = listings.filter(self.category_q() & self.price_q())
+        status = self.get_value('status')
+        if status == 'active':
+            listings = listings.filter(is_active=True)
+        elif status == 'closed':
+            listings = listings.filter(is_active=False)
+        if self.get_value('has_image'):
+            listings = listings.exclude(image='').exclude(image__isnull=True)
+        if self.get_value('ending_before') is not None:
+            listings = listings.filter(end_date__lt=self.get_value('ending_before'))
+        return listings
+    
+    def sorted_queryset(self, listings):
+        sort = self.get_value('sort') or 'newest'
+        listings = self.filter_queryset(listings)
+        if sort == 'ending_soon':
+            # Listings without an end date, or past it, would otherwise sort first
+            listings = listings.filter(end_date__gt=timezone.now())
+        return listings.order_by(*self.SORT_ORDERS.get(sort, self.SORT_ORDERS['newest']))
+    
+    def page_size(self):
+        return self.get_value('per_page') or self.PAGE_SIZES[0]
+    
+    def facet_aggregates(self):
+        """
+        Conditional counts for a single aggregate pass over the base queryset.
+        Category counts keep the price filter and price counts keep the
+        category filter, so each facet shows what picking another value of
+        that facet would return.
+        """
+        aggregates = {}
+        if self.fixed_category is None:
+            price_q = self.price_q()
+            categories = self.categories if self.categories is not None else Category.objects.all()
+            for category in categories:
+                aggregates[f'category_{category.pk}'] = Count('pk', filter=Q(category=category) & price_q)
+        category_q = self.category_q()
+        for index, (_, low, high) in enumerate(self.PRICE_BUCKETS):
+            condition = Q()
+            if low is not None:
+                condition &= Q(current_price__gte=low)
+            if high is not None:
+                condition &= Q(current_price__lt=high)
+            aggregates[f'price_{index}'] = Count('pk', filter=condition & category_q)
+        return aggregates
@@ -0,0 +1,57 @@
+"""
+Duplicate suppression for form submissions that carry an idempotency key.
+
+The bid form renders a fresh random key, so a double-click, a client retry
+or a resubmitted page sends the same key again. The first submission claims
+the key in the shared cache and stores its outcome (the flash messages it
+produced) there for OUTCOME_TIMEOUT; repeats get the same messages back
+without running validation or writing anything. The cache is bounded (the
+file cache culls at MAX_ENTRIES), so a placed bid is also recorded with its
+key under a unique (user, idempotency_key) constraint, which still
+recognises the repeat once the cached outcome is gone.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+PENDING = 'pending'
+CLAIM_TIMEOUT = 30  # seconds a claimed key may stay without an outcome
+OUTCOME_TIMEOUT = 60 * 10
+KEY_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+def get_cache():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE', 'shared')]
+
+
+def clean_key(value):
+    """Return ``value`` if it looks like a key the form generated, else None."""
+    return value if value and KEY_RE.match(value) else None
+
+
+def cache_key(scope, user_id, key):
+    return f'idempotency:{scope}:{user_id}:{key}'
+
+
+def claim(scope, user_id, key):
+    """
+    Claim ``key`` for this request. Returns None when the caller owns it and
+    should do the work, otherwise the stored outcome, or PENDING while the
+    first submission is still running.
+    """
+    cache = get_cache()
+    name = cache_key(scope, user_id, key)
+    if cache.add(name, PENDING, CLAIM_TIMEOUT):
+        return None
+    return cache.get(name, PENDING)
+
+
+def store(scope, user_id, key, outcome):
+    get_cache().set(cache_key(scope, user_id, key), outcome, OUTCOME_TIMEOUT)
+
+
+def release(scope, user_id, key):
+    """Forget a claim whose request failed unexpectedly, so a retry runs again."""
+    get_cache().delete(cache_key(scope, user_id, key))
@@ -0,0 +1,143 @@
+"""
+Cross-process cache invalidation through version counters in the database.
+
+Each worker process keeps its own in-memory cache. An entry records the
+versions of the tables it was built from ("listing", "bid", "category",
+"watchlist"), and every write to one of those tables bumps its CacheVersion
+row: signal handlers cover model saves and watchlist changes, and code that
+writes with QuerySet.update() calls bump() itself, inside the same
+transaction where there is one.
+
+CacheVersionMiddleware makes a request read the counters lazily, in one
+query, at most once; an entry is reused for as long as no process has
+committed a write to a table it depends on. Bids are only ever deleted
+together with their listing, so bid deletions are not tracked and anything
+cached from bids should also depend on "listing".
+
+Placing a bid saves its listing with update_fields limited to BID_FIELDS;
+that save only bumps "bid", so pages cached from "listing" survive the
+bidding. Anything cached from current_price or bid_count should depend on
+"bid" as well, or pass a max_age to bound how stale it can get.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .models import Bid, CacheVersion, Category, Listing
+
+
+LISTING = 'listing'
+BID = 'bid'
+CATEGORY = 'category'
+WATCHLIST = 'watchlist'
+MAX_ENTRIES = 1000
+# Listing columns a bid writes; saves limited to these don't bump "listing"
+BID_FIELDS = frozenset({'current_price', 'bid_count'})
+
+_state = threading.local()
+
+
+def begin_request():
+    _state.in_request = True
+    _state.versions = None
+
+
+def end_request():
+    _state.in_request = False
+    _state.versions = None
+
+
+def forget_versions():
+    _state.versions = None
+
+
+def current_versions(names):
+    """Versions of ``names``; read once per request, and on every call outside one."""
+    versions = getattr(_state, 'versions', None)
+    if versions is None:
+        versions = dict(CacheVersion.objects.values_list('name', 'version'))
+        if getattr(_state, 'in_request', False):
+            _state.versions = versions
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def bump(*names):
+    """Invalidate everything cached from ``names``, in every process, once the write commits."""
+    names = set(names)
+    updated = CacheVersion.objects.filter(name__in=names).update(version=F('version') + 1)
+    if updated < len(names):
+        existing = set(CacheVersion.objects.filter(name__in=names).values_list('name', flat=True))
+        for name in names - existing:
+            CacheVersion.objects.get_or_create(name=name, defaults={'version': 1})
+    # Let the rest of this request see its own write.
+    transaction.on_commit(forget_versions)
+
+
+class LocalCache:
+    """Process-local LRU of values tagged with the versions they were built from."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_build(self, key, depends_on, build, max_age=None):
+        versions = current_versions(depends_on)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == versions and (max_age is None or now - entry[2] < max_age):
+                self.entries.move_to_end(key)
+                return entry[1]
+        value = build()
+        # A version read inside an open transaction may still be rolled back.
+        if not connection.in_atomic_block:
+            with self.lock:
+                self.entries[key] = (versions, value, now)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache()
+
+
+def cached(key, depends_on, build, max_age=None):
+    """
+    Return the cached value for ``key``, rebuilding it with ``build()`` after a
+    write to ``depends_on`` or, with ``max_age``, once it is that many seconds old.
+    """
+    return local_cache.get_or_build(key, tuple(depends_on), build, max_age)
+
+
+TRACKED_MODELS = {Listing: LISTING, Bid: BID, Category: CATEGORY}
+
+
+def bump_on_write(sender, update_fields=None, **kwargs):
+    if sender is Listing and update_fields and update_fields <= BID_FIELDS:
+        return
+    bump(TRACKED_MODELS[sender])
+
+
+def bump_on_watchlist_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump(WATCHLIST)
+
+
+def connect_signals():
+    for model in TRACKED_MODELS:
+        post_save.connect(bump_on_write, sender=model, dispatch_uid=f'cache_version_save_{model.__name__}')
+    # No post_delete for Bid: a receiver would turn every batched purge
+    # delete into per-row signals (see the module docstring).
+    for model in (Listing, Category):
+        post_delete.connect(bump_on_write, sender=model, dispatch_uid=f'cache_version_delete_{model.__name__}')
+    m2m_changed.connect(bump_on_watchlist_change, sender=Listing.watchlist.through, dispatch_uid='cache_version_watchlist')
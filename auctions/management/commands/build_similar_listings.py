@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.recommendations import TOP_K, rebuild_similar_listings, refresh_similar_listings
+
+
+class Command(BaseCommand):
+    help = "Precompute \"similar listings\" from TF-IDF vectors (incremental by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Rebuild neighbours and the saved vectors for every listing instead of only new ones.",
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=TOP_K,
+            help="Neighbours stored per listing (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['full']:
+            count = rebuild_similar_listings(k=options['top_k'])
+        else:
+            count = refresh_similar_listings(k=options['top_k'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated similar listings for {count} listings in {elapsed:.1f}s."
+        ))
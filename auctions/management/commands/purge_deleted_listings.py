@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.purge import BATCH_PAUSE, BATCH_SIZE, purge_deleted_listings
+
+
+class Command(BaseCommand):
+    help = "Purge soft-deleted listings and their bids in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help="Rows deleted per transaction (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=BATCH_PAUSE,
+            help="Seconds to sleep between batches (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running as a worker, polling for new deletions.",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=10.0,
+            help="With --loop, seconds between polls (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            listings, rows = purge_deleted_listings(options['batch_size'], options['pause'])
+            if listings or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Purged {listings} listings ({rows} rows)."
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.traffic import read_trace, replay_traffic, summarize_trace
+
+
+class Command(BaseCommand):
+    help = "Replay a captured traffic trace against a running local copy of the app."
+
+    def add_arguments(self, parser):
+        parser.add_argument('trace', help="File written by TrafficCaptureMiddleware.")
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help="Server to drive (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help="Parallel client workers (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--recorded-speed', action='store_true',
+            help="Issue requests at their recorded offsets instead of as fast as possible.",
+        )
+        parser.add_argument(
+            '--speedup', type=float, default=1.0,
+            help="With --recorded-speed, compress recorded time by this factor.",
+        )
+        parser.add_argument('--limit', type=int, help="Only replay the first N requests.")
+
+    def handle(self, *args, **options):
+        try:
+            records = read_trace(options['trace'])
+        except OSError as error:
+            raise CommandError(f"Cannot read trace: {error}")
+        if options['limit']:
+            records = records[:options['limit']]
+        if not records:
+            raise CommandError("The trace contains no replayable requests.")
+
+        rows, elapsed, failures = replay_traffic(
+            records,
+            options['base_url'],
+            concurrency=options['concurrency'],
+            recorded_speed=options['recorded_speed'],
+            speedup=options['speedup'],
+        )
+        recorded = {row['url_name']: row for row in summarize_trace(records)}
+
+        self.stdout.write(
+            f"{'view name':<40}{'count':>7}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'rec p50':>9}{'rec p99':>9}"
+        )
+        for row in rows:
+            baseline = recorded.get(row['url_name'], {})
+            self.stdout.write(
+                f"{row['url_name']:<40}{row['count']:>7}{row['errors']:>8}{row['throughput']:>9.1f}"
+                f"{row['p50']:>9.1f}{row['p90']:>9.1f}{row['p99']:>9.1f}"
+                f"{baseline.get('p50', 0):>9.1f}{baseline.get('p99', 0):>9.1f}"
+            )
+        for failure, count in failures.most_common(10):
+            self.stderr.write(f"{count} x {failure}")
+        limited = sum(row['statuses'].get(429, 0) for row in rows)
+        if limited:
+            self.stderr.write(f"{limited} requests were rejected by the rate limiter (counted as errors).")
+        total = sum(row['count'] for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} req/s)."
+        ))
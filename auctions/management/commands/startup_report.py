@@ -0,0 +1,81 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.warmup import read_reports
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start time of a fresh worker, or summarize reports written to STARTUP_REPORT_PATH."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help="Fresh interpreters to start; medians are reported (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--entry', choices=('wsgi', 'asgi'), default='wsgi',
+            help="Application module to load (default: %(default)s).",
+        )
+        parser.add_argument('--from-file', help="Summarize an existing report file instead of measuring.")
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help="Slowest modules to list, by median self time (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        if options['from_file']:
+            try:
+                reports = read_reports(options['from_file'])
+            except OSError as error:
+                raise CommandError(f"Cannot read reports: {error}")
+        else:
+            reports = self.measure(options['runs'], options['entry'])
+        if not reports:
+            raise CommandError("No startup reports to summarize.")
+
+        def median(values):
+            return statistics.median(values) if values else 0.0
+
+        self.stdout.write(f"{len(reports)} worker start(s), medians:")
+        for key in ('startup_ms', 'imports_ms', 'warmup_ms'):
+            self.stdout.write(f"  {key:<28}{median([report[key] for report in reports]):>10.1f}")
+        steps = defaultdict(list)
+        for report in reports:
+            for name, ms in report['steps'].items():
+                steps[name].append(ms)
+        for name, values in steps.items():
+            self.stdout.write(f"  {'warm-up ' + name:<28}{median(values):>10.1f}")
+
+        modules = defaultdict(lambda: ([], []))
+        for report in reports:
+            for name, cumulative, own in report['modules']:
+                modules[name][0].append(cumulative)
+                modules[name][1].append(own)
+        ranked = sorted(modules.items(), key=lambda item: -median(item[1][1]))[:options['top']]
+        self.stdout.write(f"\n{'module':<48}{'self ms':>10}{'cumul ms':>10}")
+        for name, (cumulative, own) in ranked:
+            self.stdout.write(f"{name:<48}{median(own):>10.2f}{median(cumulative):>10.2f}")
+
+        errors = {name: error for report in reports for name, error in report['errors'].items()}
+        for name, error in errors.items():
+            self.stderr.write(f"Warm-up step {name} failed: {error}")
+
+    def measure(self, runs, entry):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'startup.jsonl')
+            environment = dict(os.environ, STARTUP_REPORT_PATH=path)
+            for _ in range(runs):
+                result = subprocess.run(
+                    [sys.executable, '-c', f'import commerce.{entry}'],
+                    cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True,
+                )
+                if result.returncode != 0:
+                    raise CommandError(f"Worker failed to start:\n{result.stderr}")
+            return read_reports(path) if os.path.exists(path) else []
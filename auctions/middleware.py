@@ -0,0 +1,195 @@
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+from .invalidation import begin_request, end_request
+from .ratelimit import set_user_cookie
+from .traffic import append_record, capture_record
+
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MUTABLE_MAX_AGE = 60
+
+
+def accepted_encodings(header):
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def parse_etags(header):
+    return {tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()}
+
+
+class StaticAssetMiddleware:
+    """
+    Serve collected static files straight from STATIC_ROOT.
+
+    Fingerprinted names produced by the manifest storage get far-future,
+    immutable cache headers, and precompressed ``.br``/``.gz`` siblings are
+    returned when the client accepts them. Requests outside STATIC_URL fall
+    through untouched, and when DEBUG is on the staticfiles runserver handler
+    answers first, so this only matters in production.
+    """
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = getattr(settings, 'STATIC_ROOT', None)
+        self.prefix = settings.STATIC_URL
+
+    def __call__(self, request):
+        if self.root and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        hashed = bool(HASHED_NAME_RE.search(name))
+        stat = os.stat(path)
+        serve_path, encoding, etag_suffix = path, None, ''
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for candidate, suffix in self.encodings:
+            if accepted.get(candidate, accepted.get('*', 0)) > 0 and os.path.isfile(path + suffix):
+                serve_path, encoding, etag_suffix = path + suffix, candidate, '-' + candidate[:2]
+                break
+        # Each representation gets its own validator, so caches never swap them
+        etag = '"%x-%x%s"' % (int(stat.st_mtime), stat.st_size, etag_suffix)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+            self.add_cache_headers(response, etag, hashed)
+            return response
+
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(open(serve_path, 'rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        self.add_cache_headers(response, etag, hashed)
+        return response
+
+    @staticmethod
+    def add_cache_headers(response, etag, hashed):
+        response['ETag'] = etag
+        response['Vary'] = 'Accept-Encoding'
+        if hashed:
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={MUTABLE_MAX_AGE}'
+
+
+class CacheVersionMiddleware:
+    """
+    Scope the cache version counters to the request: they are read at most
+    once, the first time a locally cached value is needed (see
+    auctions/invalidation.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request()
+
+
+class RateLimitUserMiddleware:
+    """
+    Keep the signed cookie the per-user rate-limit buckets are keyed on in
+    step with logins and logouts (see auctions/ratelimit.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        set_user_cookie(request, response)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request when staff ask for it with ``?_profile=1`` or an
+    ``X-Profile: 1`` header. The stored profile's id is returned in the
+    ``X-Profile-Id`` response header. Untriggered requests only pay for one
+    dictionary lookup; the profiler is imported on first use.
+    """
+
+    query_param = '_profile'
+    header = 'HTTP_X_PROFILE'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.query_param not in request.GET and self.header not in request.META:
+            return self.get_response(request)
+        user = request.user
+        if not (user.is_authenticated and (user.is_staff or user.is_admin)):
+            return self.get_response(request)
+
+        from .profiling import profile_request
+        response, profile = profile_request(request, self.get_response)
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+
+class TrafficCaptureMiddleware:
+    """
+    Append an anonymized record of every request to TRAFFIC_CAPTURE_PATH for
+    later replay (see auctions/traffic.py). Unset the setting to remove the
+    middleware from the stack entirely.
+    """
+
+    def __init__(self, get_response):
+        self.path = getattr(settings, 'TRAFFIC_CAPTURE_PATH', None)
+        if not self.path:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.time()
+        response = self.get_response(request)
+        duration = time.time() - started
+        try:
+            append_record(self.path, capture_record(request, response, started, duration))
+        except OSError:
+            pass  # Capture is best effort; never fail the request over it
+        return response
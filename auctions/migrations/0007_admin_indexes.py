@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0006_rename_bidder_listing_bidders_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', '-amount'], name='bid_listing_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', '-created_date'], name='listing_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0007_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryMarketStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('closed_count', models.PositiveIntegerField(default=0)),
+                ('sold_count', models.PositiveIntegerField(default=0)),
+                ('sell_through_rate', models.FloatField(blank=True, null=True)),
+                ('median_closing_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('mean_bid_increment', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('median_bid_increment', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('median_time_to_first_bid', models.DurationField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+                ('category', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='market_stats', to='auctions.category')),
+            ],
+            options={
+                'verbose_name_plural': 'Category market stats',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0008_categorymarketstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarListing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='auctions.listing')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auctions.listing')),
+            ],
+            options={
+                'ordering': ['listing', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('listing', 'rank'), name='similar_listing_rank_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0009_similarlisting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=8)),
+                ('path', models.CharField(max_length=512)),
+                ('url_name', models.CharField(blank=True, max_length=128)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('total_ms', models.FloatField()),
+                ('view_ms', models.FloatField()),
+                ('template_ms', models.FloatField()),
+                ('sql_ms', models.FloatField()),
+                ('sql_count', models.PositiveIntegerField()),
+                ('stats', models.TextField(help_text='pstats report, sorted by cumulative time')),
+                ('folded_stacks', models.TextField(help_text='Collapsed stacks for flamegraph.pl / speedscope')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
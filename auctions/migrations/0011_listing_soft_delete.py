@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0010_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='is_deleted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_deleted', '-created_date'], name='listing_deleted_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_date'], name='listing_purge_queue_idx'),
+        ),
+    ]
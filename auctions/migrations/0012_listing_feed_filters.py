@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_count(apps, schema_editor):
+    Listing = apps.get_model('auctions', 'Listing')
+    Bid = apps.get_model('auctions', 'Bid')
+    counts = Bid.objects.filter(listing=OuterRef('pk')).order_by().values('listing').annotate(c=Count('id')).values('c')
+    Listing._base_manager.update(bid_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0011_listing_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', 'current_price'], name='listing_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', '-bid_count'], name='listing_active_bids_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', 'end_date'], name='listing_active_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['category', '-created_date'], name='listing_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['category', 'current_price'], name='listing_category_price_idx'),
+        ),
+        migrations.RunPython(backfill_bid_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+def create_counters(apps, schema_editor):
+    CacheVersion = apps.get_model('auctions', 'CacheVersion')
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(name=name) for name in ('listing', 'bid', 'category', 'watchlist')],
+        ignore_conflicts=True,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0012_listing_feed_filters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0013_cache_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='bid',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='bid_user_idempotency_key_unique'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0014_bid_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', 'bid_time'], name='bid_listing_time_idx'),
+        ),
+    ]
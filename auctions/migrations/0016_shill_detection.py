@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0015_bid_time_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShillScan',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_bid_id', models.PositiveBigIntegerField()),
+                ('bids_processed', models.PositiveIntegerField(default=0)),
+                ('accounts_flagged', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-last_bid_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BidGraphEdge',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('tiny_increment_count', models.PositiveIntegerField(default=0)),
+                ('bidder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bidder', 'seller'), name='bid_graph_edge_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShillSuspect',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('status', models.CharField(choices=[('new', 'New'), ('cleared', 'Cleared'), ('confirmed', 'Confirmed')], default='new', max_length=16)),
+                ('bid_count', models.PositiveIntegerField()),
+                ('listing_count', models.PositiveIntegerField()),
+                ('won_count', models.PositiveIntegerField()),
+                ('seller_concentration', models.FloatField(help_text='Share of listings bid on that belong to the top seller')),
+                ('seller_dominance', models.FloatField(help_text="Share of all bids on the top seller's listings placed by this account")),
+                ('tiny_increment_share', models.FloatField()),
+                ('reasons', models.TextField()),
+                ('first_flagged', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('top_seller', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='shill_review', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='shill_suspect_status_idx')],
+            },
+        ),
+    ]
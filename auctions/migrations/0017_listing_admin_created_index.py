@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0016_shill_detection'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['-created_date', '-id'], name='listing_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0017_listing_admin_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_deleted_created_idx',
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0018_drop_listing_deleted_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_bids_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_end_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_category_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_category_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-created_date', '-id'], name='listing_feed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['current_price', 'id'], name='listing_feed_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-bid_count', '-id'], name='listing_feed_bids_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['end_date', 'id'], name='listing_feed_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['category', '-created_date', '-id'], name='listing_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['category', 'current_price', 'id'], name='listing_category_price_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0019_listing_partial_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shillscan',
+            name='running',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddConstraint(
+            model_name='shillscan',
+            constraint=models.UniqueConstraint(condition=models.Q(('running', True)), fields=('running',), name='shill_scan_single_running'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0020_shill_scan_running'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_feed_end_idx',
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('end_date__isnull', False), ('is_deleted', False)), fields=['end_date', 'id'], name='listing_feed_end_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from decimal import Decimal
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from .validators import validate_listing_title
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -30,6 +30,37 @@ class Category(models.Model):
 
 
 
+class ListingManager(models.Manager):
+    """Hides soft-deleted listings from every default query."""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+    
+    def bid_on_by(self, user, status=None):
+        """
+        Listings ``user`` has bid on, annotated in one grouped query with
+        ``my_top_bid``, ``my_bid_count`` and ``my_last_bid``. ``status`` may be
+        "leading", "outbid", "won" or "closed" (ended on the user's bid without
+        a recorded win). Newest activity first.
+        """
+        # Filtering on bid__user before annotating makes the aggregates
+        # cover only this user's bids on each listing.
+        listings = self.filter(bid__user=user).annotate(
+            my_top_bid=models.Max('bid__amount'),
+            my_bid_count=models.Count('bid'),
+            my_last_bid=models.Max('bid__bid_time'),
+        ).select_related('category', 'winner')
+        if status == 'won':
+            listings = listings.filter(winner=user)
+        elif status == 'leading':
+            listings = listings.filter(is_active=True, my_top_bid__gte=models.F('current_price'))
+        elif status == 'outbid':
+            listings = listings.filter(my_top_bid__lt=models.F('current_price')).exclude(winner=user)
+        elif status == 'closed':
+            listings = listings.filter(is_active=False, my_top_bid__gte=models.F('current_price')).exclude(winner=user)
+        return listings.order_by('-my_last_bid', '-id')
+
+
 class Listing(models.Model):
     title = models.CharField(max_length=64, unique=True, validators=[validate_listing_title])
     description = models.CharField(max_length=512)
@@ -44,6 +75,30 @@ class Listing(models.Model):
     winner = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="listings_won", null=True, blank=True)  # Changed to SET_NULL
     created_date = models.DateTimeField(auto_now_add=True)
     end_date = models.DateTimeField(null=True, blank=True)  # Optional: auction end time
+    # Soft delete: hidden at once, bids and watchlist rows purged later by purge_deleted_listings
+    is_deleted = models.BooleanField(default=False)
+    deleted_date = models.DateTimeField(null=True, blank=True)
+    bid_count = models.PositiveIntegerField(default=0)  # Denormalized for sorting the feed by bids
+    
+    objects = ListingManager()
+    all_objects = models.Manager()
+    
+    class Meta:
+        indexes = [
+            # The admin changelist order; Django appends -pk as the tie-breaker
+            models.Index(fields=['-created_date', '-id'], name='listing_created_idx'),
+            models.Index(fields=['deleted_date'], condition=models.Q(is_deleted=True), name='listing_purge_queue_idx'),
+            # Feed sort orders, each with the tie-breaker of SORT_ORDERS. Partial
+            # on the default manager's filter so the sort column leads and the
+            # feed can walk the index instead of sorting; price_desc scans
+            # listing_feed_price_idx backwards.
+            models.Index(fields=['-created_date', '-id'], condition=models.Q(is_deleted=False), name='listing_feed_created_idx'),
+            models.Index(fields=['current_price', 'id'], condition=models.Q(is_deleted=False), name='listing_feed_price_idx'),
+            models.Index(fields=['-bid_count', '-id'], condition=models.Q(is_deleted=False), name='listing_feed_bids_idx'),
+            models.Index(fields=['end_date', 'id'], condition=models.Q(is_deleted=False, end_date__isnull=False), name='listing_feed_end_idx'),
+            models.Index(fields=['category', '-created_date', '-id'], condition=models.Q(is_deleted=False), name='listing_category_created_idx'),
+            models.Index(fields=['category', 'current_price', 'id'], condition=models.Q(is_deleted=False), name='listing_category_price_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -65,6 +120,14 @@ class Listing(models.Model):
         """Returns the current price (highest bid or starting price)"""
         return self.current_price or self.starting_price
     
+    def bid_status_for(self, user):
+        """Status of ``user`` on a listing annotated by ListingManager.bid_on_by."""
+        if self.winner_id == user.pk:
+            return "won"
+        if self.my_top_bid >= self.get_current_price():
+            return "leading" if self.is_active else "closed"
+        return "outbid"
+    
     def get_highest_bid(self):
         """Returns the highest bid object"""
         return self.bid_set.order_by('-amount').first()
@@ -89,6 +152,18 @@ class Listing(models.Model):
             return False, "This auction is no longer active."
         return True, ""
     
+    def soft_delete(self):
+        """Hide the listing immediately; the purge worker removes it and its rows later."""
+        self.is_deleted = True
+        self.is_active = False
+        self.deleted_date = timezone.now()
+        from .invalidation import LISTING, bump
+        with transaction.atomic():
+            Listing.all_objects.filter(pk=self.pk).update(
+                is_deleted=True, is_active=False, deleted_date=self.deleted_date,
+            )
+            bump(LISTING)
+    
     def close_auction(self):
         """Close the auction and set the winner"""
         highest_bid = self.get_highest_bid()
@@ -104,9 +179,20 @@ class Bid(models.Model):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     bid_time = models.DateTimeField(auto_now_add=True)
+    # Sent with the bid form so repeated submissions are recognised (auctions/idempotency.py)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
     
     class Meta:
         ordering = ['-amount']
+        # Guards against the same bid being stored twice (migration 0006)
+        unique_together = [('user', 'listing', 'amount')]
+        indexes = [
+            models.Index(fields=['listing', '-amount'], name='bid_listing_amount_idx'),
+            models.Index(fields=['listing', 'bid_time'], name='bid_listing_time_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='bid_user_idempotency_key_unique'),
+        ]
     
     def clean(self):
         """Fixed validation to handle None values properly"""
@@ -139,4 +225,142 @@ class Bid(models.Model):
         super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"${self.amount} by {self.user.username} on {self.listing.title}"
\ No newline at end of file
+        return f"${self.amount} by {self.user.username} on {self.listing.title}"
+
+class CategoryMarketStats(models.Model):
+    """Per-category price statistics, rebuilt by the compute_market_stats command."""
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, null=True, blank=True, related_name="market_stats")
+    listing_count = models.PositiveIntegerField(default=0)
+    bid_count = models.PositiveIntegerField(default=0)
+    closed_count = models.PositiveIntegerField(default=0)
+    sold_count = models.PositiveIntegerField(default=0)
+    sell_through_rate = models.FloatField(null=True, blank=True)
+    median_closing_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    mean_bid_increment = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    median_bid_increment = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    median_time_to_first_bid = models.DurationField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name_plural = "Category market stats"
+    
+    def __str__(self):
+        return f"Market stats for {self.category or 'Uncategorized'}"
+
+
+class SimilarListing(models.Model):
+    """Precomputed nearest neighbours of a listing, rebuilt by build_similar_listings."""
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="similar_entries")
+    similar = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['listing', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'rank'], name='similar_listing_rank_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.listing_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
+class RequestProfile(models.Model):
+    """A staff-triggered profile of one request, recorded by ProfilingMiddleware."""
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=512)
+    url_name = models.CharField(max_length=128, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    total_ms = models.FloatField()
+    view_ms = models.FloatField()
+    template_ms = models.FloatField()
+    sql_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField()
+    stats = models.TextField(help_text="pstats report, sorted by cumulative time")
+    folded_stacks = models.TextField(help_text="Collapsed stacks for flamegraph.pl / speedscope")
+    created_date = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_date']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.total_ms:.0f} ms)"
+
+
+class CacheVersion(models.Model):
+    """A counter bumped with every write to one cached table; see auctions/invalidation.py."""
+    name = models.CharField(max_length=32, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class BidGraphEdge(models.Model):
+    """Running bidder -> seller bid counts, maintained incrementally by detect_shill_bidding."""
+    bidder = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    bid_count = models.PositiveIntegerField(default=0)
+    listing_count = models.PositiveIntegerField(default=0)  # Distinct listings of this seller bid on
+    tiny_increment_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bidder', 'seller'], name='bid_graph_edge_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bidder_id} -> {self.seller_id} ({self.bid_count} bids)"
+
+
+class ShillScan(models.Model):
+    """One run of detect_shill_bidding; the highest last_bid_id is where the next run resumes."""
+    last_bid_id = models.PositiveBigIntegerField()
+    bids_processed = models.PositiveIntegerField(default=0)
+    accounts_flagged = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    running = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['-last_bid_id']
+        constraints = [
+            # At most one scan at a time; a second run fails to create its row
+            models.UniqueConstraint(fields=['running'], condition=models.Q(running=True), name='shill_scan_single_running'),
+        ]
+    
+    def __str__(self):
+        return f"Shill scan up to bid {self.last_bid_id}"
+
+
+class ShillSuspect(models.Model):
+    """An account whose bidding pattern looks like shill bidding, queued for review in the admin."""
+    STATUS_CHOICES = [
+        ('new', 'New'),
+        ('cleared', 'Cleared'),
+        ('confirmed', 'Confirmed'),
+    ]
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="shill_review")
+    score = models.FloatField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='new')
+    top_seller = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    bid_count = models.PositiveIntegerField()
+    listing_count = models.PositiveIntegerField()
+    won_count = models.PositiveIntegerField()
+    seller_concentration = models.FloatField(help_text="Share of listings bid on that belong to the top seller")
+    seller_dominance = models.FloatField(help_text="Share of all bids on the top seller's listings placed by this account")
+    tiny_increment_share = models.FloatField()
+    reasons = models.TextField()
+    first_flagged = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['status', '-score'], name='shill_suspect_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} ({self.score:.2f})"
@@ -0,0 +1,154 @@
+"""
+On-demand request profiling for staff users.
+
+cProfile gives the deterministic per-function report; a sampling thread
+records real call stacks for flamegraphs (collapsed/folded format).
+The view, template rendering and SQL split is exclusive: SQL run while a
+template renders (lazy querysets) counts as SQL, not template time.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+from django.template.base import Template
+
+from .models import RequestProfile
+
+
+TEMPLATE_RENDER_CODE = Template.render.__code__
+STATS_LIMIT = 60
+SAMPLE_INTERVAL = 0.001
+
+
+def inside_template(frame):
+    while frame is not None:
+        if frame.f_code is TEMPLATE_RENDER_CODE:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class QueryTimer:
+    """Execute wrapper that times every query and notes which ran during template rendering."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.in_template = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total += elapsed
+            if inside_template(sys._getframe(1)):
+                self.in_template += elapsed
+
+
+def short_filename(filename):
+    for marker in ('site-packages/', 'lib/python'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample the profiled thread's stack every ``interval`` seconds and count
+    identical stacks. cProfile only keeps caller/callee edges, so real call
+    stacks for a flamegraph have to come from sampling.
+    """
+
+    def __init__(self, thread_id, root_frame=None, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.counts = Counter()
+        self.labels = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root_frame:
+                stack.append(self.label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = f"{code.co_name} ({short_filename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def folded(self):
+        """Collapsed stacks, one ``frame;frame;frame count`` line per distinct stack."""
+        return '\n'.join(f"{stack} {count}" for stack, count in sorted(self.counts.items()))
+
+
+def template_time(stats):
+    """Cumulative seconds spent in Template.render (outermost calls only)."""
+    for func, (_, _, _, cumulative, _) in stats.stats.items():
+        if func[2] == 'render' and func[0] == TEMPLATE_RENDER_CODE.co_filename and func[1] == TEMPLATE_RENDER_CODE.co_firstlineno:
+            return cumulative
+    return 0.0
+
+
+def profile_request(request, get_response):
+    """Run ``get_response`` under cProfile and store a RequestProfile. Returns (response, profile)."""
+    timer = QueryTimer()
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), sys._getframe())
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        sampler.start()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+            total = time.perf_counter() - started
+            sampler.stop()
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats('cumulative').print_stats(STATS_LIMIT)
+
+    template = template_time(stats)
+    template_only = max(0.0, template - timer.in_template)
+    view_only = max(0.0, total - template - (timer.total - timer.in_template))
+    match = getattr(request, 'resolver_match', None)
+    user = request.user if request.user.is_authenticated else None
+    profile = RequestProfile.objects.create(
+        user=user,
+        method=request.method,
+        path=request.get_full_path()[:512],
+        url_name=(match.url_name or '') if match else '',
+        status_code=response.status_code,
+        total_ms=total * 1000,
+        view_ms=view_only * 1000,
+        template_ms=template_only * 1000,
+        sql_ms=timer.total * 1000,
+        sql_count=timer.count,
+        stats=report.getvalue(),
+        folded_stacks=sampler.folded(),
+    )
+    return response, profile
@@ -0,0 +1,57 @@
+"""
+Background purge of soft-deleted listings.
+
+Deleting a popular listing in one request cascades every Bid, watchlist and
+SimilarListing row in a single transaction, holding SQLite's write lock for
+the whole time. Instead the view only flags the listing, and this worker
+removes its rows in small batches with one short transaction per batch.
+"""
+import time
+
+from django.db import transaction
+
+from .models import Bid, Listing, SimilarListing
+
+
+BATCH_SIZE = 500
+BATCH_PAUSE = 0.05
+
+
+def delete_in_batches(queryset, batch_size=BATCH_SIZE, pause=BATCH_PAUSE):
+    """Delete ``queryset`` batch by batch by primary key. Returns rows deleted."""
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            queryset.model._base_manager.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            # Let writers on other listings take the lock between batches.
+            time.sleep(pause)
+
+
+def purge_listing(listing_id, batch_size=BATCH_SIZE, pause=BATCH_PAUSE):
+    """Remove a soft-deleted listing and everything hanging off it. Returns rows deleted."""
+    watchlist = Listing.watchlist.through.objects.filter(listing_id=listing_id)
+    deleted = delete_in_batches(Bid.objects.filter(listing_id=listing_id), batch_size, pause)
+    deleted += delete_in_batches(watchlist, batch_size, pause)
+    deleted += delete_in_batches(SimilarListing.objects.filter(listing_id=listing_id), batch_size, pause)
+    deleted += delete_in_batches(SimilarListing.objects.filter(similar_id=listing_id), batch_size, pause)
+    # Only the listing row itself is left, so the final cascade is trivial.
+    with transaction.atomic():
+        deleted += Listing.all_objects.filter(pk=listing_id, is_deleted=True).delete()[0]
+    return deleted
+
+
+def purge_deleted_listings(batch_size=BATCH_SIZE, pause=BATCH_PAUSE, limit=None):
+    """Purge soft-deleted listings, oldest deletion first. Returns (listings, rows) purged."""
+    pending = Listing.all_objects.filter(is_deleted=True).order_by('deleted_date').values_list('pk', flat=True)
+    if limit:
+        pending = pending[:limit]
+    listings = rows = 0
+    for listing_id in list(pending):
+        rows += purge_listing(listing_id, batch_size, pause)
+        listings += 1
+    return listings, rows
@@ -0,0 +1,188 @@
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from .cache import LockedFileBasedCache
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+USER_COOKIE = 'ratelimit_user'
+USER_COOKIE_SALT = 'auctions.ratelimit.user'
+
+# Buckets per scope; settings.RATE_LIMITS replaces them. "user" and "ip" are
+# keyed per client, "global" is a single bucket shared by everyone and sheds
+# load once the write path is saturated.
+DEFAULT_RATE_LIMITS = {
+    'bid': {'user': '20/m', 'ip': '60/m', 'global': '50/s'},
+    'watchlist': {'user': '60/m', 'ip': '120/m', 'global': '100/s'},
+    'create_listing': {'user': '10/m', 'ip': '30/m', 'global': '10/s'},
+    'login': {'ip': '10/m', 'global': '20/s'},
+}
+
+
+def parse_rate(rate):
+    """Turn '10/m' into (capacity, tokens refilled per second)."""
+    count, _, period = rate.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period[-1]] / int(period[:-1] or 1)
+
+
+def get_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'ratelimit')]
+
+
+def rate_limits():
+    return getattr(settings, 'RATE_LIMITS', DEFAULT_RATE_LIMITS)
+
+
+def get_limits(scope):
+    return rate_limits().get(scope, {})
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def user_identity(request):
+    """
+    The id of the signed-in user, for the per-user buckets. It normally comes
+    from the signed cookie set at login, without a database query. A request
+    that carries a session but not that cookie falls back to request.user, so
+    dropping the cookie does not give a client a fresh bucket, and gets the
+    cookie set on its response.
+    """
+    user_id = request.get_signed_cookie(USER_COOKIE, default=None, salt=USER_COOKIE_SALT)
+    if user_id is None and settings.SESSION_COOKIE_NAME in request.COOKIES:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            user_id = request.rate_limit_user_id = str(user.pk)
+    return user_id
+
+
+def remember_user(sender, request, user, **kwargs):
+    if request is not None:
+        request.rate_limit_user_id = str(user.pk)
+
+
+def forget_user(sender, request, **kwargs):
+    if request is not None:
+        request.rate_limit_user_id = ''
+
+
+def connect_signals():
+    user_logged_in.connect(remember_user, dispatch_uid='ratelimit_remember_user')
+    user_logged_out.connect(forget_user, dispatch_uid='ratelimit_forget_user')
+
+
+def set_user_cookie(request, response):
+    """Set or delete the per-user bucket cookie after a login, a logout or a fallback lookup."""
+    user_id = getattr(request, 'rate_limit_user_id', None)
+    if user_id:
+        response.set_signed_cookie(
+            USER_COOKIE, user_id, salt=USER_COOKIE_SALT, max_age=settings.SESSION_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+        )
+    elif user_id == '':
+        response.delete_cookie(USER_COOKIE, samesite='Lax')
+
+
+def bucket_lock(cache):
+    """
+    Serialize bucket updates across processes. LockedFileBasedCache provides
+    the lock. Other backends are only atomic within a single process.
+    """
+    return cache.lock() if isinstance(cache, LockedFileBasedCache) else nullcontext()
+
+
+def take_tokens(cache, buckets, now=None):
+    """
+    Take one token from each of ``buckets``, (key, capacity, refill rate)
+    tuples, or from none of them. Returns (0, None) when the request may
+    proceed, otherwise (seconds until every bucket has a token, index of the
+    first empty bucket). Call it under bucket_lock().
+    """
+    now = time.time() if now is None else now
+    stored = cache.get_many([key for key, _, _ in buckets])
+    levels, wait, empty = [], 0, None
+    for index, (key, capacity, refill_rate) in enumerate(buckets):
+        tokens, updated = stored.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) / refill_rate)
+            empty = index if empty is None else empty
+        levels.append(tokens)
+    if empty is not None:
+        return wait, empty
+    for (key, capacity, refill_rate), tokens in zip(buckets, levels):
+        cache.set(key, (tokens - 1, now), int(capacity / refill_rate) + 1)
+    return 0, None
+
+
+def check_rate_limit(request, scope):
+    """Return seconds to wait if any bucket for ``scope`` is empty, else 0."""
+    identities = {
+        'user': user_identity(request),
+        'ip': client_ip(request),
+        'global': 'all',
+    }
+    kinds, buckets = [], []
+    for kind, rate in get_limits(scope).items():
+        identity = identities.get(kind)
+        if identity:
+            kinds.append(kind)
+            buckets.append((f'ratelimit:{scope}:{kind}:{identity}', *parse_rate(rate)))
+    if not buckets:
+        return 0
+    cache = get_cache()
+    with bucket_lock(cache):
+        wait, empty = take_tokens(cache, buckets)
+        if wait:
+            record_rejection(cache, scope, kinds[empty])
+    return wait
+
+
+def record_rejection(cache, scope, kind):
+    """Count a rejected request. Call it under bucket_lock()."""
+    key = f'ratelimit:rejected:{scope}:{kind}'
+    cache.set(key, cache.get(key, 0) + 1, None)
+
+
+def rejected_counts():
+    """Return the number of rejected requests per scope and bucket kind."""
+    cache = get_cache()
+    keys = [
+        f'ratelimit:rejected:{scope}:{kind}'
+        for scope, limits in rate_limits().items()
+        for kind in limits
+    ]
+    found = cache.get_many(keys)
+    return {key.split(':', 2)[2]: found.get(key, 0) for key in keys}
+
+
+def rate_limit(scope, methods=('POST',)):
+    """
+    Reject requests to the decorated view with 429 once the ``scope`` buckets
+    run dry. Apply it outermost so it runs before authentication and any
+    database work done by the view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                wait = check_rate_limit(request, scope)
+                if wait:
+                    response = HttpResponse(
+                        "Too many requests. Please slow down and try again shortly.",
+                        status=429,
+                        content_type='text/plain',
+                    )
+                    response['Retry-After'] = str(int(wait) + 1)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,292 @@
+"""
+"Similar listings" built from TF-IDF vectors over title, description and category.
+
+Vectors are built offline as a sparse matrix with L2-normalised rows, so the
+product of a block of rows with the transposed matrix gives cosine
+similarities. The product is taken one column block at a time and only the
+running top-k of each row is kept, so memory stays bounded by BLOCK_SIZE x
+COLUMN_BLOCK_SIZE scores however many listings there are. The top-k
+neighbours of each listing are stored in SimilarListing and the detail page
+reads them with one indexed lookup.
+
+A full build saves the vectors, vocabulary, IDF weights and the highest
+listing id processed to SIMILAR_LISTINGS_INDEX_PATH. Incremental runs load
+that index and vectorize only the listings added since, so a listing is
+processed once even when none of its neighbours scores above zero. IDF
+weights and the vectors of edited listings are refreshed by the next full
+build.
+"""
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+
+from .models import Listing, SimilarListing
+
+
+TOP_K = 8
+BLOCK_SIZE = 1000
+COLUMN_BLOCK_SIZE = 10000  # 1000 x 10000 float32 scores, 40 MB per block
+SPLICE_BATCH_SIZE = 500
+TITLE_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.5
+
+TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have in is it its of on or that the this to was
+    were will with new used good great condition item items very
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def listing_terms(title, description, category_id):
+    """Weighted term counts for one listing. The category is a pseudo-term."""
+    terms = Counter()
+    for token in tokenize(title):
+        terms[token] += TITLE_WEIGHT
+    for token in tokenize(description):
+        terms[token] += 1
+    if category_id is not None:
+        terms[f"__category_{category_id}"] += CATEGORY_WEIGHT
+    return terms
+
+
+def index_path():
+    return getattr(settings, 'SIMILAR_LISTINGS_INDEX_PATH', os.path.join(settings.BASE_DIR, 'cache', 'similar-listings.npz'))
+
+
+def read_term_counts(listings, vocabulary):
+    """(ids, sparse term frequencies) of ``listings`` in id order; new terms are added to ``vocabulary``."""
+    indices, data, indptr = [], [], [0]
+    ids = []
+    rows = listings.order_by('id').values_list('id', 'title', 'description', 'category_id')
+    for listing_id, title, description, category_id in rows.iterator(chunk_size=2000):
+        for term, weight in listing_terms(title, description, category_id).items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            # Sublinear term frequency keeps long descriptions from dominating.
+            data.append(1 + math.log(weight))
+        indptr.append(len(indices))
+        ids.append(listing_id)
+    counts = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(ids), len(vocabulary)),
+    )
+    return np.asarray(ids, dtype=np.int64), counts
+
+
+def tf_idf(counts, idf):
+    matrix = counts @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix, dtype=np.float32)
+
+
+class ListingVectors:
+    """Sparse TF-IDF matrix, one row per listing id in ascending order."""
+
+    def __init__(self, ids, matrix, vocabulary, idf, last_id):
+        self.ids = ids
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.last_id = last_id
+
+    @classmethod
+    def build(cls):
+        vocabulary = {}
+        ids, counts = read_term_counts(Listing.objects.all(), vocabulary)
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = (np.log((1 + len(ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return cls(ids, tf_idf(counts, idf), vocabulary, idf, int(ids[-1]) if len(ids) else 0)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            matrix = sparse.csr_matrix((saved['data'], saved['indices'], saved['indptr']), shape=tuple(saved['shape']))
+            vocabulary = {term: column for column, term in enumerate(saved['terms'].tolist())}
+            return cls(saved['ids'], matrix, vocabulary, saved['idf'], int(saved['last_id']))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as target:
+            np.savez(
+                target, ids=self.ids, data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                shape=np.asarray(self.matrix.shape), terms=np.asarray(terms, dtype=str), idf=self.idf,
+                last_id=np.asarray(self.last_id),
+            )
+        os.replace(temporary, path)
+
+    def keep_only(self, listing_ids):
+        """Drop the rows of listings that have been deleted since the index was built."""
+        present = np.isin(self.ids, np.fromiter(listing_ids, dtype=np.int64))
+        if not present.all():
+            self.ids = self.ids[present]
+            self.matrix = self.matrix[present]
+
+    def add_new_listings(self):
+        """Vectorize listings added since the last run with the stored IDF weights. Returns their rows."""
+        ids, counts = read_term_counts(Listing.objects.filter(id__gt=self.last_id), self.vocabulary)
+        unseen = len(self.vocabulary) - len(self.idf)
+        if unseen:
+            # Weighted as if each new term occurred in one listing
+            rare = np.float32(math.log((1 + len(self.ids)) / 2) + 1)
+            self.idf = np.concatenate((self.idf, np.full(unseen, rare, dtype=np.float32)))
+        first = len(self.ids)
+        matrix = self.matrix.copy()
+        matrix.resize((matrix.shape[0], len(self.vocabulary)))
+        self.matrix = sparse.vstack([matrix, tf_idf(counts, self.idf)], format='csr')
+        self.ids = np.concatenate((self.ids, ids))
+        if len(ids):
+            self.last_id = int(ids[-1])
+        return np.arange(first, len(self.ids))
+
+    def similarity_blocks(self, rows, column_block_size=COLUMN_BLOCK_SIZE):
+        """Yield (first column, dense cosine similarities of ``rows`` against each column block)."""
+        block = self.matrix[rows]
+        for start in range(0, len(self.ids), column_block_size):
+            end = min(start + column_block_size, len(self.ids))
+            scores = (block @ self.matrix[start:end].T).toarray()
+            # A listing is not its own neighbour
+            inside = (rows >= start) & (rows < end)
+            scores[np.flatnonzero(inside), rows[inside] - start] = 0
+            yield start, scores
+
+
+class TopK:
+    """The k best scores of each row, merged in one column block at a time."""
+
+    def __init__(self, n_rows, k):
+        self.k = k
+        self.scores = np.zeros((n_rows, k), dtype=np.float32)
+        self.columns = np.zeros((n_rows, k), dtype=np.int64)
+
+    def add(self, first_column, scores):
+        if self.k == 0 or not scores.shape[1]:
+            return
+        k = min(self.k, scores.shape[1])
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        merged_scores = np.concatenate((self.scores, np.take_along_axis(scores, candidates, axis=1)), axis=1)
+        merged_columns = np.concatenate((self.columns, candidates + first_column), axis=1)
+        keep = np.argpartition(-merged_scores, self.k - 1, axis=1)[:, :self.k]
+        self.scores = np.take_along_axis(merged_scores, keep, axis=1)
+        self.columns = np.take_along_axis(merged_columns, keep, axis=1)
+
+    def best(self):
+        """Return (columns, scores) of the positive entries per row, best first, ties by column."""
+        order = np.lexsort((self.columns, -self.scores), axis=1)
+        columns = np.take_along_axis(self.columns, order, axis=1)
+        scores = np.take_along_axis(self.scores, order, axis=1)
+        keep = scores > 0
+        return [c[m] for c, m in zip(columns, keep)], [s[m] for s, m in zip(scores, keep)]
+
+
+def neighbour_rows(vectors, listing_id, columns, scores):
+    return [
+        SimilarListing(listing_id=listing_id, similar_id=int(vectors.ids[column]), rank=rank, score=float(score))
+        for rank, (column, score) in enumerate(zip(columns, scores), start=1)
+    ]
+
+
+def store_neighbours(listing_ids, entries):
+    with transaction.atomic():
+        SimilarListing.objects.filter(listing_id__in=listing_ids).delete()
+        SimilarListing.objects.bulk_create(entries)
+
+
+def store_block(vectors, rows, k, column_block_size, on_scores=None):
+    """Compute and store the neighbours of ``rows``, passing each column block's scores to ``on_scores``."""
+    best = TopK(len(rows), k)
+    for first_column, scores in vectors.similarity_blocks(rows, column_block_size):
+        best.add(first_column, scores)
+        if on_scores is not None:
+            on_scores(first_column, scores)
+    block_ids = vectors.ids[rows].tolist()
+    entries = []
+    for listing_id, row_columns, row_scores in zip(block_ids, *best.best()):
+        entries.extend(neighbour_rows(vectors, listing_id, row_columns, row_scores))
+    store_neighbours(block_ids, entries)
+
+
+def rebuild_similar_listings(k=TOP_K, block_size=BLOCK_SIZE, column_block_size=COLUMN_BLOCK_SIZE, path=None):
+    """Recompute neighbours for every listing and save the index. Returns the number of listings processed."""
+    vectors = ListingVectors.build()
+    for start in range(0, len(vectors.ids), block_size):
+        rows = np.arange(start, min(start + block_size, len(vectors.ids)))
+        store_block(vectors, rows, k, column_block_size)
+    vectors.save(path or index_path())
+    return len(vectors.ids)
+
+
+def refresh_similar_listings(k=TOP_K, block_size=BLOCK_SIZE, column_block_size=COLUMN_BLOCK_SIZE, path=None):
+    """
+    Compute neighbours for listings added since the last run, and splice
+    them into the stored neighbour lists of existing listings they now
+    outrank. Falls back to a full build when there is no saved index.
+    Returns the number of new listings processed.
+    """
+    path = path or index_path()
+    if not os.path.exists(path):
+        return rebuild_similar_listings(k, block_size, column_block_size, path)
+    vectors = ListingVectors.load(path)
+    vectors.keep_only(Listing.objects.values_list('id', flat=True).iterator(chunk_size=10000))
+    new_rows = vectors.add_new_listings()
+
+    for start in range(0, len(new_rows), block_size):
+        rows = new_rows[start:start + block_size]
+        block_ids = vectors.ids[rows].tolist()
+
+        def splice(first_column, scores):
+            # Only the existing listings in this column block; new ones get their own lists
+            existing = min(scores.shape[1], max(new_rows[0] - first_column, 0))
+            splice_new_neighbours(vectors, first_column, scores[:, :existing], block_ids, k)
+
+        store_block(vectors, rows, k, column_block_size, on_scores=splice)
+    vectors.save(path)
+    return len(new_rows)
+
+
+def splice_new_neighbours(vectors, first_column, scores, new_ids, k):
+    """Merge the new listings (rows of ``scores``) into the neighbours of the listings in its columns."""
+    columns = np.flatnonzero(scores.max(axis=0, initial=0) > 0)
+    if not len(columns):
+        return
+    best = TopK(len(columns), k)
+    best.add(0, scores[:, columns].T)
+    affected_ids = vectors.ids[columns + first_column].tolist()
+    candidate_rows, candidate_scores = best.best()
+    for offset in range(0, len(affected_ids), SPLICE_BATCH_SIZE):
+        batch = slice(offset, offset + SPLICE_BATCH_SIZE)
+        merge_neighbours(affected_ids[batch], candidate_rows[batch], candidate_scores[batch], new_ids, k)
+
+
+def merge_neighbours(affected_ids, candidate_rows, candidate_scores, new_ids, k):
+    stored = {}
+    for entry in SimilarListing.objects.filter(listing_id__in=affected_ids).only('listing_id', 'similar_id', 'score'):
+        stored.setdefault(entry.listing_id, {})[entry.similar_id] = entry.score
+
+    entries = []
+    changed = []
+    for listing_id, rows, row_scores in zip(affected_ids, candidate_rows, candidate_scores):
+        current = stored.get(listing_id, {})
+        candidates = dict(current)
+        candidates.update((new_ids[row], float(score)) for row, score in zip(rows, row_scores))
+        ranked = sorted(candidates.items(), key=lambda item: -item[1])[:k]
+        if {similar_id for similar_id, _ in ranked} == set(current):
+            continue
+        changed.append(listing_id)
+        entries.extend(
+            SimilarListing(listing_id=listing_id, similar_id=similar_id, rank=rank, score=score)
+            for rank, (similar_id, score) in enumerate(ranked, start=1)
+        )
+    if changed:
+        store_neighbours(changed, entries)
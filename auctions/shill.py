@@ -0,0 +1,364 @@
+"""
+Offline shill-bidding detection over the bidder -> seller bid graph.
+
+The detect_shill_bidding job folds new bids into BidGraphEdge rows (bids,
+distinct listings and tiny-increment bids per bidder/seller pair), reading
+Bid in id order from where the previous run stopped. A run stops at its time
+budget and the next one resumes, so the full history is worked through in
+nightly windows. Bids younger than SETTLE_SECONDS are left for the next run,
+because a bid can commit after a higher id has already been read.
+
+Scoring loads the edges into a CSR graph (bidder segments over parallel
+arrays) and rates each account that bid on at least MIN_LISTINGS listings
+on four patterns: its bids concentrate on one seller, it supplies much of
+that seller's bidding, it never wins, and it raises prices by tiny steps.
+Accounts scoring above the threshold are written to ShillSuspect for review
+in the admin; a reviewer's status is kept across runs, and open suspects the
+latest scores no longer flag are removed.
+
+Only one run may work at a time: its ShillScan row is created with
+running=True under a partial unique constraint, so a concurrent run fails
+with ScanInProgress instead of folding the same bids in twice. A row left
+running by a killed process stops counting after STALE_SCAN_SECONDS.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .analytics import to_float
+from .models import Bid, BidGraphEdge, Listing, ShillScan, ShillSuspect
+
+
+CHUNK_SIZE = 50_000
+LOOKUP_BATCH_SIZE = 500
+SETTLE_SECONDS = 300
+TINY_INCREMENT_RATIO = 0.02
+MIN_LISTINGS = 3
+FLAG_THRESHOLD = 0.6
+STALE_SCAN_SECONDS = 60 * 60 * 12
+WEIGHTS = {
+    'concentration': 0.35,
+    'dominance': 0.25,
+    'no_wins': 0.2,
+    'tiny': 0.2,
+}
+SUSPECT_FIELDS = (
+    'score', 'top_seller', 'bid_count', 'listing_count', 'won_count',
+    'seller_concentration', 'seller_dominance', 'tiny_increment_share', 'reasons', 'updated',
+)
+
+
+class ScanInProgress(Exception):
+    """Another detect_shill_bidding run holds the scan."""
+
+
+def batched(values, size=LOOKUP_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def last_processed_bid():
+    return ShillScan.objects.aggregate(last=Max('last_bid_id'))['last'] or 0
+
+
+def read_bids(after, before_time, chunk_size):
+    """The next ``chunk_size`` settled bids after id ``after`` as parallel arrays, or None."""
+    rows = list(
+        Bid.objects.filter(id__gt=after, bid_time__lt=before_time).order_by('id')
+        .values_list('id', 'user_id', 'listing_id', 'amount')[:chunk_size]
+    )
+    if not rows:
+        return None
+    ids, bidders, listings, amounts = zip(*rows)
+    return (np.asarray(ids, dtype=np.int64), np.asarray(bidders, dtype=np.int64),
+            np.asarray(listings, dtype=np.int64), to_float(amounts))
+
+
+def earlier_state(listing_ids, after):
+    """(listing, bidder) pairs seen in bids up to ``after``, and the top earlier amount per listing."""
+    pairs, top_amount = set(), {}
+    if not after:
+        return pairs, top_amount
+    for batch in batched(listing_ids):
+        rows = (
+            Bid.objects.filter(listing_id__in=batch, id__lte=after)
+            .values_list('listing_id', 'user_id').annotate(top=Max('amount')).order_by()
+        )
+        for listing_id, user_id, top in rows:
+            pairs.add((listing_id, user_id))
+            top_amount[listing_id] = max(top_amount.get(listing_id, top), top)
+    return pairs, top_amount
+
+
+def edge_deltas(after, ids, bidders, listing_ids, amounts):
+    """
+    Fold one chunk of bids into per-edge increments.
+    Returns (edges as an (n, 2) bidder/seller array, bids, new listings, tiny increments).
+    """
+    unique_listings = np.unique(listing_ids).tolist()
+    owners, starting = {}, {}
+    for batch in batched(unique_listings):
+        for listing_id, owner_id, starting_price in Listing.all_objects.filter(id__in=batch).values_list(
+            'id', 'owner_id', 'starting_price',
+        ):
+            owners[listing_id] = owner_id
+            starting[listing_id] = float(starting_price)
+    # Bids of listings purged since the chunk was read are dropped.
+    known = np.fromiter((listing_id in owners for listing_id in listing_ids.tolist()), dtype=bool, count=len(ids))
+    ids, bidders, listing_ids, amounts = ids[known], bidders[known], listing_ids[known], amounts[known]
+    sellers = np.fromiter((owners[listing_id] for listing_id in listing_ids.tolist()), dtype=np.int64, count=len(ids))
+    pairs, top_amount = earlier_state(unique_listings, after)
+
+    # Walk each listing's bids in order: the previous price is the bid before,
+    # or the best earlier bid, or the starting price.
+    order = np.lexsort((ids, listing_ids))
+    listing_sorted, amount_sorted = listing_ids[order], amounts[order]
+    previous = np.concatenate(([np.nan], amount_sorted[:-1]))
+    first = np.concatenate(([True], listing_sorted[1:] != listing_sorted[:-1]))
+    previous[first] = [top_amount.get(listing_id, starting[listing_id]) for listing_id in listing_sorted[first].tolist()]
+    tiny_sorted = (previous > 0) & (amount_sorted - previous < TINY_INCREMENT_RATIO * previous)
+    tiny = np.empty_like(tiny_sorted)
+    tiny[order] = tiny_sorted
+
+    # A bid opens a new (listing, bidder) pair if it is the pair's first.
+    pair_rows, first_index = np.unique(np.stack([listing_ids, bidders], axis=1), axis=0, return_index=True)
+    new_listing = np.zeros(len(ids), dtype=bool)
+    for (listing_id, bidder_id), index in zip(pair_rows.tolist(), first_index.tolist()):
+        if (listing_id, bidder_id) not in pairs:
+            new_listing[index] = True
+
+    edges, inverse = np.unique(np.stack([bidders, sellers], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    return (
+        edges,
+        np.bincount(inverse, minlength=len(edges)),
+        np.bincount(inverse, weights=new_listing, minlength=len(edges)).astype(np.int64),
+        np.bincount(inverse, weights=tiny, minlength=len(edges)).astype(np.int64),
+    )
+
+
+def apply_deltas(edges, bids, listings, tiny):
+    """Add the increments to the stored edges. Call inside a transaction."""
+    stored = {}
+    for batch in batched(np.unique(edges[:, 0]).tolist()):
+        for edge in BidGraphEdge.objects.filter(bidder_id__in=batch):
+            stored[(edge.bidder_id, edge.seller_id)] = edge
+    changed, created = [], []
+    for (bidder_id, seller_id), bid_count, listing_count, tiny_count in zip(
+        edges.tolist(), bids.tolist(), listings.tolist(), tiny.tolist(),
+    ):
+        edge = stored.get((bidder_id, seller_id))
+        if edge is None:
+            created.append(BidGraphEdge(
+                bidder_id=bidder_id, seller_id=seller_id, bid_count=bid_count,
+                listing_count=listing_count, tiny_increment_count=tiny_count,
+            ))
+        else:
+            edge.bid_count += bid_count
+            edge.listing_count += listing_count
+            edge.tiny_increment_count += tiny_count
+            changed.append(edge)
+    BidGraphEdge.objects.bulk_update(changed, ['bid_count', 'listing_count', 'tiny_increment_count'], batch_size=LOOKUP_BATCH_SIZE)
+    BidGraphEdge.objects.bulk_create(created, batch_size=LOOKUP_BATCH_SIZE)
+
+
+class BidGraph:
+    """
+    Bidder -> seller edges in CSR form: bidder i owns the parallel-array
+    entries indptr[i]:indptr[i + 1], sorted by seller.
+    """
+
+    def __init__(self, bidders, sellers, bids, listings, tiny):
+        order = np.lexsort((sellers, bidders))
+        self.bidder_ids, bidder_index = np.unique(bidders[order], return_inverse=True)
+        self.bidder_index = bidder_index.ravel()
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(self.bidder_index, minlength=len(self.bidder_ids)))))
+        self.sellers = sellers[order]
+        self.bids = bids[order]
+        self.listings = listings[order]
+        self.tiny = tiny[order]
+        self.seller_ids, seller_index = np.unique(self.sellers, return_inverse=True)
+        self.seller_index = seller_index.ravel()
+        # Weighted in-degree: every bid each seller's listings received
+        self.seller_bids = np.bincount(self.seller_index, weights=self.bids, minlength=len(self.seller_ids))
+
+    @classmethod
+    def load(cls):
+        rows = list(BidGraphEdge.objects.values_list(
+            'bidder_id', 'seller_id', 'bid_count', 'listing_count', 'tiny_increment_count',
+        ).iterator(chunk_size=CHUNK_SIZE))
+        columns = np.asarray(rows, dtype=np.int64).reshape(-1, 5)
+        return cls(*columns.T)
+
+    def __len__(self):
+        return len(self.bidder_ids)
+
+    def bidder_sums(self, values):
+        return np.add.reduceat(values, self.indptr[:-1]) if len(self) else np.zeros(0, dtype=values.dtype)
+
+    def top_edges(self):
+        """Per bidder, the edge to the seller with most listings bid on (then most bids)."""
+        order = np.lexsort((self.bids, self.listings, self.bidder_index))
+        return order[self.indptr[1:] - 1]
+
+
+def won_counts(user_ids):
+    wins = dict(
+        Listing.all_objects.filter(winner__isnull=False).values_list('winner_id').annotate(won=Count('id')).order_by()
+    )
+    return np.fromiter((wins.get(user_id, 0) for user_id in user_ids.tolist()), dtype=np.int64, count=len(user_ids))
+
+
+def score_accounts(graph):
+    """Per-bidder metric arrays and the combined score."""
+    bids = graph.bidder_sums(graph.bids)
+    listings = graph.bidder_sums(graph.listings)
+    tiny = graph.bidder_sums(graph.tiny)
+    top = graph.top_edges()
+    wins = won_counts(graph.bidder_ids)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'bids': bids,
+            'listings': listings,
+            'wins': wins,
+            'top_seller': graph.sellers[top],
+            'concentration': np.nan_to_num(graph.listings[top] / listings),
+            'dominance': np.nan_to_num(graph.bids[top] / graph.seller_bids[graph.seller_index[top]]),
+            'no_wins': 1 - np.nan_to_num(np.minimum(1, wins / listings), nan=1.0),
+            'tiny': np.nan_to_num(tiny / bids),
+        }
+    metrics['score'] = sum(weight * metrics[name] for name, weight in WEIGHTS.items())
+    metrics['eligible'] = listings >= MIN_LISTINGS
+    return metrics
+
+
+def reasons_for(metrics, row):
+    reasons = []
+    if metrics['concentration'][row] >= 0.5:
+        reasons.append(f"{metrics['concentration'][row]:.0%} of the {metrics['listings'][row]} listings bid on belong to one seller")
+    if metrics['dominance'][row] >= 0.3:
+        reasons.append(f"placed {metrics['dominance'][row]:.0%} of all bids on that seller's listings")
+    if metrics['wins'][row] == 0:
+        reasons.append(f"has won none of the {metrics['listings'][row]} listings bid on")
+    if metrics['tiny'][row] >= 0.3:
+        reasons.append(f"{metrics['tiny'][row]:.0%} of bids raised the price by under {TINY_INCREMENT_RATIO:.0%}")
+    return '; '.join(reasons)
+
+
+def clear_stale_suspects(flagged_user_ids):
+    """Delete open suspects that are no longer flagged; reviewed ones keep their row. Call inside a transaction."""
+    flagged = set(flagged_user_ids)
+    stale = [
+        user_id for user_id in ShillSuspect.objects.filter(status='new').values_list('user_id', flat=True)
+        if user_id not in flagged
+    ]
+    for batch in batched(stale):
+        ShillSuspect.objects.filter(user_id__in=batch, status='new').delete()
+    return len(stale)
+
+
+def store_suspects(graph, metrics, threshold):
+    """Upsert ShillSuspect rows for flagged bidders and clear stale ones. Returns how many were flagged."""
+    flagged = np.flatnonzero(metrics['eligible'] & (metrics['score'] >= threshold))
+    user_ids = graph.bidder_ids[flagged].tolist()
+    existing = {}
+    for batch in batched(user_ids):
+        existing.update((suspect.user_id, suspect) for suspect in ShillSuspect.objects.filter(user_id__in=batch))
+    changed, created = [], []
+    now = timezone.now()
+    for row, user_id in zip(flagged.tolist(), user_ids):
+        values = {
+            'score': round(float(metrics['score'][row]), 4),
+            'top_seller_id': int(metrics['top_seller'][row]),
+            'bid_count': int(metrics['bids'][row]),
+            'listing_count': int(metrics['listings'][row]),
+            'won_count': int(metrics['wins'][row]),
+            'seller_concentration': round(float(metrics['concentration'][row]), 4),
+            'seller_dominance': round(float(metrics['dominance'][row]), 4),
+            'tiny_increment_share': round(float(metrics['tiny'][row]), 4),
+            'reasons': reasons_for(metrics, row),
+        }
+        suspect = existing.get(user_id)
+        if suspect is None:
+            created.append(ShillSuspect(user_id=user_id, **values))
+        else:
+            for name, value in values.items():
+                setattr(suspect, name, value)
+            suspect.updated = now  # bulk_update skips auto_now
+            changed.append(suspect)
+    with transaction.atomic():
+        if changed:
+            ShillSuspect.objects.bulk_update(changed, SUSPECT_FIELDS, batch_size=LOOKUP_BATCH_SIZE)
+        ShillSuspect.objects.bulk_create(created, batch_size=LOOKUP_BATCH_SIZE)
+        clear_stale_suspects(user_ids)
+    return len(flagged)
+
+
+def expire_stale_scans(now):
+    """Stop counting scans left running by a process that died more than STALE_SCAN_SECONDS ago."""
+    ShillScan.objects.filter(running=True, started_at__lt=now - timedelta(seconds=STALE_SCAN_SECONDS)).update(running=False)
+
+
+def start_scan(now):
+    """Create the running ShillScan of a new run, or raise ScanInProgress."""
+    expire_stale_scans(now)
+    try:
+        with transaction.atomic():
+            return ShillScan.objects.create(
+                last_bid_id=last_processed_bid(), started_at=now, finished_at=now, running=True,
+            )
+    except IntegrityError:
+        raise ScanInProgress("Another shill-bidding scan is running.")
+
+
+def reset_bid_graph():
+    """Forget all processed bids so the next run rebuilds the graph from the start."""
+    expire_stale_scans(timezone.now())
+    with transaction.atomic():
+        if ShillScan.objects.filter(running=True).exists():
+            raise ScanInProgress("Cannot reset the graph while a shill-bidding scan is running.")
+        BidGraphEdge.objects.all().delete()
+        ShillScan.objects.all().delete()
+
+
+def detect_shill_bidding(chunk_size=CHUNK_SIZE, max_seconds=None, threshold=FLAG_THRESHOLD):
+    """
+    Fold new bids into the graph until caught up or ``max_seconds`` have
+    passed, then score every account. Returns the ShillScan of this run and
+    whether it caught up with the settled bids.
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    settled_before = now - timedelta(seconds=SETTLE_SECONDS)
+    scan = start_scan(now)
+
+    caught_up = False
+    try:
+        while max_seconds is None or time.monotonic() - started < max_seconds:
+            chunk = read_bids(scan.last_bid_id, settled_before, chunk_size)
+            if chunk is None:
+                caught_up = True
+                break
+            deltas = edge_deltas(scan.last_bid_id, *chunk)
+            with transaction.atomic():
+                apply_deltas(*deltas)
+                scan.last_bid_id = int(chunk[0][-1])
+                scan.bids_processed += len(chunk[0])
+                scan.save(update_fields=['last_bid_id', 'bids_processed'])
+
+        graph = BidGraph.load()
+        if len(graph):
+            scan.accounts_flagged = store_suspects(graph, score_accounts(graph), threshold)
+        else:
+            with transaction.atomic():
+                clear_stale_suspects(())
+    finally:
+        scan.running = False
+        scan.finished_at = timezone.now()
+        scan.save(update_fields=['accounts_flagged', 'finished_at', 'running'])
+    return scan, caught_up
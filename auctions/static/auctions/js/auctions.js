@@ -0,0 +1,262 @@
+// Shared page behaviour for the listing feed, category, detail and watchlist pages.
+// Loaded once per session from a hashed, long-cached static URL instead of being
+// inlined into every template.
+
+function getCsrfToken() {
+    const meta = document.querySelector('meta[name="csrf-token"]');
+    return meta ? meta.content : '';
+}
+
+// Function to update the navigation badge with actual server count
+function updateNavWatchlistCount() {
+    const navBadge = document.getElementById('nav-watchlist-count');
+    if (navBadge && navBadge.dataset.url) {
+        fetch(navBadge.dataset.url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+                return response.json();
+            })
+            .then(data => {
+                navBadge.textContent = data.count;
+                // Show/hide badge based on count
+                navBadge.style.display = data.count > 0 ? 'inline-block' : 'none';
+            })
+            .catch(error => {
+                console.error('Error fetching watchlist count:', error);
+            });
+    }
+}
+
+// Make function available globally
+window.updateNavWatchlistCount = updateNavWatchlistCount;
+
+function flashMessage(messageDiv, html) {
+    if (!messageDiv) {
+        return;
+    }
+    messageDiv.innerHTML = html;
+    setTimeout(() => {
+        messageDiv.innerHTML = '';
+    }, 3000);
+}
+
+function postToggle(url) {
+    return fetch(url, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': getCsrfToken(),
+        },
+        credentials: 'same-origin'
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error('Network response was not ok');
+        }
+        return response.json();
+    });
+}
+
+function bindWatchlistButtons() {
+    document.querySelectorAll('.watchlist-btn').forEach(button => {
+        button.addEventListener('click', function() {
+            const messageDiv = button.nextElementSibling;
+
+            // Show loading state
+            button.disabled = true;
+            button.innerHTML = '⏳ Processing...';
+
+            postToggle(button.dataset.url)
+                .then(data => {
+                    // Update button appearance
+                    if (data.is_watchlisted) {
+                        button.classList.remove('btn-outline-warning');
+                        button.classList.add('btn-warning');
+                        button.innerHTML = '★ Remove from Watchlist';
+                    } else {
+                        button.classList.remove('btn-warning');
+                        button.classList.add('btn-outline-warning');
+                        button.innerHTML = '☆ Add to Watchlist';
+                    }
+                    updateNavWatchlistCount();
+                    flashMessage(messageDiv, `<div class="alert alert-success">${data.message}</div>`);
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    flashMessage(messageDiv, `<div class="alert alert-danger">Error updating watchlist</div>`);
+                })
+                .finally(() => {
+                    button.disabled = false;
+                });
+        });
+    });
+}
+
+function showEmptyWatchlist() {
+    const container = document.getElementById('watchlist-items');
+    if (!container) {
+        return;
+    }
+    // Other pages still have items: reload so this page refills
+    if (parseInt(container.dataset.numPages || '1', 10) > 1) {
+        window.location.reload();
+        return;
+    }
+    const intro = document.getElementById('watchlist-intro');
+    if (intro) intro.remove();
+    const bulk = document.getElementById('watchlist-bulk');
+    if (bulk) bulk.remove();
+
+    const emptyMsg = document.createElement('div');
+    emptyMsg.className = 'alert alert-info empty-watchlist-message mt-3';
+    emptyMsg.innerHTML = `Your watchlist is empty. <a href="${container.dataset.indexUrl}">Browse listings</a> to add items to your watchlist.`;
+    container.replaceWith(emptyMsg);
+}
+
+function bindWatchlistRemoveButtons() {
+    document.querySelectorAll('.remove-watchlist-btn').forEach(button => {
+        button.addEventListener('click', function() {
+            const listingElement = document.getElementById(`listing-${button.dataset.listingId}`);
+            const messageDiv = button.nextElementSibling;
+
+            button.disabled = true;
+            button.innerHTML = '<span class="spinner-border spinner-border-sm" role="status"></span> Removing...';
+
+            postToggle(button.dataset.url)
+                .then(data => {
+                    if (data.status === 'success' && !data.is_watchlisted) {
+                        flashMessage(messageDiv, `<div class="alert alert-success">${data.message}</div>`);
+
+                        listingElement.style.opacity = '0';
+                        listingElement.style.transition = 'opacity 0.3s ease';
+
+                        setTimeout(() => {
+                            listingElement.remove();
+                            updateNavWatchlistCount();
+
+                            // Check if this was the last item
+                            if (document.querySelectorAll('[id^="listing-"]').length === 0) {
+                                showEmptyWatchlist();
+                            }
+                        }, 300);
+                    }
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    messageDiv.innerHTML = `<div class="alert alert-danger">Error removing from watchlist</div>`;
+                    button.disabled = false;
+                    button.innerHTML = '★ Remove from Watchlist';
+                });
+        });
+    });
+}
+
+function bindWatchlistBulkRemove() {
+    const bulk = document.getElementById('watchlist-bulk');
+    if (!bulk) {
+        return;
+    }
+    const selectAll = document.getElementById('watchlist-select-all');
+    const removeButton = document.getElementById('watchlist-remove-selected');
+    const messageDiv = bulk.querySelector('.watchlist-message');
+    const selected = () => Array.from(document.querySelectorAll('.watchlist-select:checked'));
+    const refreshButton = () => {
+        removeButton.disabled = selected().length === 0;
+    };
+
+    document.querySelectorAll('.watchlist-select').forEach(box => box.addEventListener('change', refreshButton));
+    selectAll.addEventListener('change', function() {
+        document.querySelectorAll('.watchlist-select').forEach(box => {
+            box.checked = selectAll.checked;
+        });
+        refreshButton();
+    });
+
+    removeButton.addEventListener('click', function() {
+        const body = new FormData();
+        body.append('action', 'remove');
+        selected().forEach(box => body.append('listing_ids', box.value));
+
+        removeButton.disabled = true;
+        fetch(bulk.dataset.url, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCsrfToken(),
+            },
+            credentials: 'same-origin',
+            body: body
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            data.listing_ids.forEach(id => {
+                const listingElement = document.getElementById(`listing-${id}`);
+                if (listingElement) listingElement.remove();
+            });
+            selectAll.checked = false;
+            updateNavWatchlistCount();
+            flashMessage(messageDiv, `<div class="alert alert-success">Removed ${data.listing_ids.length} item(s) from your watchlist.</div>`);
+            if (document.querySelectorAll('[id^="listing-"]').length === 0) {
+                showEmptyWatchlist();
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            flashMessage(messageDiv, `<div class="alert alert-danger">Error removing from watchlist</div>`);
+        })
+        .finally(refreshButton);
+    });
+}
+
+function bindDeleteButtons() {
+    document.querySelectorAll('.delete-btn').forEach(button => {
+        button.addEventListener('click', function() {
+            const listingName = button.dataset.name;
+
+            Swal.fire({
+                title: 'Permanent Deletion!',
+                text: "This will PERMANENTLY delete listing " + listingName + " and all associated bids. This action cannot be undone!",
+                icon: 'warning',
+                showCancelButton: true,
+                confirmButtonColor: '#d33',
+                cancelButtonColor: '#3085d6',
+                confirmButtonText: 'Yes, delete permanently!',
+                cancelButtonText: 'Cancel'
+            }).then((result) => {
+                if (result.isConfirmed) {
+                    // Show loading state
+                    button.innerHTML = '⏳ Deleting...';
+                    button.disabled = true;
+
+                    // Find and submit the form
+                    button.closest('.delete-form').submit();
+                }
+            });
+        });
+    });
+}
+
+function focusBidField() {
+    // Auto-focus on bid amount field and select all text for easy replacement
+    const bidAmountField = document.getElementById('bid_amount');
+    if (bidAmountField) {
+        bidAmountField.focus();
+        bidAmountField.addEventListener('focus', function() {
+            this.select();
+        });
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    updateNavWatchlistCount();
+    bindWatchlistButtons();
+    bindWatchlistRemoveButtons();
+    bindWatchlistBulkRemove();
+    bindDeleteButtons();
+    focusBidField();
+});
@@ -0,0 +1,59 @@
+// Price history chart on the listing detail page. The server sends an
+// already downsampled timeline, so this only has to draw a step line.
+
+const SVG_NS = 'http://www.w3.org/2000/svg';
+
+function svgElement(name, attributes) {
+    const element = document.createElementNS(SVG_NS, name);
+    Object.entries(attributes).forEach(([key, value]) => element.setAttribute(key, value));
+    return element;
+}
+
+function drawPriceChart(svg, points) {
+    const width = 600, height = 160, pad = {left: 60, right: 10, top: 10, bottom: 22};
+    const times = points.map(point => point[0]);
+    const prices = points.map(point => point[1]);
+    const minTime = Math.min(...times), maxTime = Math.max(...times);
+    const minPrice = Math.min(...prices), maxPrice = Math.max(...prices);
+    const x = time => pad.left + (maxTime === minTime ? 0 : (time - minTime) / (maxTime - minTime)) * (width - pad.left - pad.right);
+    const y = price => height - pad.bottom - (maxPrice === minPrice ? 0.5 : (price - minPrice) / (maxPrice - minPrice)) * (height - pad.top - pad.bottom);
+
+    // The price holds until the next bid, so draw steps rather than slopes
+    let path = `M${x(times[0])},${y(prices[0])}`;
+    for (let i = 1; i < points.length; i++) {
+        path += ` H${x(times[i])} V${y(prices[i])}`;
+    }
+    svg.appendChild(svgElement('path', {d: path, fill: 'none', stroke: '#28a745', 'stroke-width': 2}));
+
+    const label = (text, attributes) => {
+        const element = svgElement('text', Object.assign({'font-size': 11, fill: '#6c757d'}, attributes));
+        element.textContent = text;
+        svg.appendChild(element);
+    };
+    label(`$${maxPrice.toFixed(2)}`, {x: 4, y: pad.top + 8});
+    label(`$${minPrice.toFixed(2)}`, {x: 4, y: height - pad.bottom});
+    label(new Date(minTime).toLocaleDateString(), {x: pad.left, y: height - 6});
+    label(new Date(maxTime).toLocaleDateString(), {x: width - pad.right, y: height - 6, 'text-anchor': 'end'});
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const svg = document.getElementById('price-chart');
+    if (!svg) {
+        return;
+    }
+    fetch(svg.dataset.url, {credentials: 'same-origin'})
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.points.length > 1) {
+                drawPriceChart(svg, data.points);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading price history:', error);
+        });
+});
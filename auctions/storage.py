@@ -0,0 +1,55 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip siblings are always written
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that fingerprints every collected file and writes
+    precompressed ``.gz`` (and ``.br`` when brotli is installed) siblings
+    next to each hashed text asset, so they can be served without
+    compressing on every request.
+    """
+    compress_extensions = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html')
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(self.compress_extensions):
+                self._write_compressed(hashed_name)
+
+    def _write_compressed(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        if len(content) < self.min_compress_size:
+            return
+
+        gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(gzipped) < len(content):
+            self._write_sibling(path + '.gz', gzipped)
+        if brotli is not None:
+            compressed = brotli.compress(content)
+            if len(compressed) < len(content):
+                self._write_sibling(path + '.br', compressed)
+
+    @staticmethod
+    def _write_sibling(path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as target:
+            target.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,47 @@
+"""Shared fixtures for the auctions test suite."""
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from auctions.models import Category, Listing, User
+
+
+# Templates resolve {% static %} through the manifest storage, which only
+# knows files once collectstatic has run; tests use the plain storage.
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Keep test state out of the on-disk caches the running site uses.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-shared'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-ratelimit'},
+}
+
+
+@override_settings(
+    STORAGES=TEST_STORAGES, CACHES=TEST_CACHES, TRAFFIC_CAPTURE_PATH=None,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class AuctionsTestCase(TestCase):
+    password = 'secret-pass-1'
+
+    def setUp(self):
+        for name in TEST_CACHES:
+            caches[name].clear()
+
+    def create_user(self, username, **extra):
+        return User.objects.create_user(username, f'{username}@example.com', self.password, **extra)
+
+    def create_listing(self, owner, title='Listing', starting_price='10.00', **extra):
+        if 'category' not in extra:
+            extra['category'], _ = Category.objects.get_or_create(name='Tools')
+        return Listing.objects.create(
+            owner=owner, title=title, description='A test listing',
+            starting_price=Decimal(starting_price), **extra,
+        )
+
+    def login(self, user):
+        self.client.login(username=user.username, password=self.password)
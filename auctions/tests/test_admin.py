@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from auctions.admin import EstimatedCountPaginator, is_unfiltered
+from auctions.models import Bid, Listing, User
+
+from .base import AuctionsTestCase
+
+
+class AdminChangelistTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', self.password)
+        self.login(self.admin)
+        self.seller = self.create_user('seller')
+        self.bidder = self.create_user('bidder')
+        self.listings = [self.create_listing(self.seller, title=f'Item {i}') for i in range(3)]
+        for listing in self.listings:
+            Bid.objects.create(user=self.bidder, listing=listing, amount=listing.starting_price + 5)
+
+    def test_listing_changelist_orders_by_indexed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:auctions_listing_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(
+            'ORDER BY "auctions_listing"."created_date" DESC, "auctions_listing"."id" DESC' in query['sql']
+            for query in queries
+        ))
+
+    def test_large_unfiltered_changelist_uses_estimate(self):
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 1):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('admin:auctions_bid_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('COUNT(*)' in query['sql'] for query in queries))
+        self.assertEqual(response.context['cl'].result_count, Bid.objects.latest('pk').pk)
+
+    def test_filtered_changelist_counts_exactly(self):
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 1):
+            response = self.client.get(reverse('admin:auctions_bid_changelist'), {'q': 'Item 1'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_listing_changelist_includes_soft_deleted_listings(self):
+        self.listings[0].soft_delete()
+        response = self.client.get(reverse('admin:auctions_listing_changelist'), {'is_deleted__exact': '1'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.listings[0]])
+        change = self.client.get(reverse('admin:auctions_listing_change', args=[self.listings[0].pk]))
+        self.assertEqual(change.status_code, 200)
+
+    def test_listing_changelist_estimates_despite_soft_delete_filter(self):
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 1):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('admin:auctions_listing_changelist'))
+                self.client.get(reverse('admin:auctions_listing_changelist'), {'is_deleted__exact': '0'})
+        self.assertFalse(any('COUNT(*)' in query['sql'] for query in queries))
+        self.assertTrue(is_unfiltered(Listing.objects.all()))
+        self.assertFalse(is_unfiltered(Listing.objects.filter(is_active=True)))
+
+    def test_close_action_picks_highest_bidder(self):
+        self.client.post(reverse('admin:auctions_listing_changelist'), {
+            'action': 'close_auctions', '_selected_action': [self.listings[0].pk],
+        })
+        listing = Listing.objects.get(pk=self.listings[0].pk)
+        self.assertFalse(listing.is_active)
+        self.assertEqual(listing.winner, self.bidder)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase
+
+from auctions.analytics import INCREMENT_BINS, compute_market_stats, grouped_median, histogram_median
+from auctions.models import Bid
+
+from .base import AuctionsTestCase
+
+
+class MedianTests(SimpleTestCase):
+    def test_grouped_median(self):
+        groups = np.array([0, 1, 1, 1, 2, 2, 0])
+        values = np.array([5.0, 3.0, 1.0, 2.0, 4.0, np.nan, 7.0])
+        result = grouped_median(groups, values, 4)
+        np.testing.assert_array_equal(result[:3], [6.0, 2.0, 4.0])
+        self.assertTrue(np.isnan(result[3]))
+
+    def test_histogram_median_is_within_one_bin(self):
+        values = np.array([0.5, 1.0, 2.0, 3.0, 10.0])
+        histogram = np.histogram(values, bins=INCREMENT_BINS)[0]
+        median = histogram_median(histogram[np.newaxis, :], np.array([len(values)]))[0]
+        self.assertAlmostEqual(median, 2.0, delta=2.0 * 0.01)
+
+    def test_histogram_median_of_empty_row_is_nan(self):
+        empty = np.zeros((1, len(INCREMENT_BINS) - 1), dtype=np.int64)
+        self.assertTrue(np.isnan(histogram_median(empty, np.array([0]))[0]))
+
+
+class MarketStatsTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        seller = self.create_user('seller')
+        bidder = self.create_user('bidder')
+        self.listings = [self.create_listing(seller, title=f'Item {i}') for i in range(3)]
+        # Increments of 5, 5, 10 on the first listing and 4 on the second
+        for listing, amounts in zip(self.listings, (['15', '20', '30'], ['14'], [])):
+            for amount in amounts:
+                Bid.objects.create(user=bidder, listing=listing, amount=Decimal(amount))
+
+    def test_increments_do_not_depend_on_chunk_size(self):
+        expected = compute_market_stats()
+        self.assertEqual(len(expected), 1)
+        stats = expected[0]
+        self.assertEqual((stats.listing_count, stats.bid_count), (3, 4))
+        self.assertEqual(stats.mean_bid_increment, Decimal('6.00'))
+        self.assertAlmostEqual(float(stats.median_bid_increment), 5.0, delta=0.05)
+        for chunk_size in (1, 2, 3):
+            stats = compute_market_stats(chunk_size=chunk_size)[0]
+            self.assertEqual((stats.bid_count, stats.mean_bid_increment), (4, Decimal('6.00')))
+
+    def test_bids_are_read_in_index_order(self):
+        sql, params = Bid.objects.order_by('listing_id', '-amount').values_list('listing_id', 'amount').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(row[3] for row in cursor.fetchall())
+        self.assertIn('bid_listing_amount_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
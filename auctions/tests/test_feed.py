@@ -0,0 +1,88 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from auctions.forms import ListingFilterForm
+from auctions.models import Listing
+
+from .base import AuctionsTestCase
+
+
+class ListingFeedTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.create_user('seller')
+        self.cheap = self.create_listing(self.seller, title='Cheap', starting_price='5.00')
+        self.dear = self.create_listing(self.seller, title='Dear', starting_price='500.00')
+        self.closed = self.create_listing(self.seller, title='Closed', starting_price='50.00', is_active=False)
+
+    def titles(self, response):
+        return [listing.title for listing in response.context['page_obj']]
+
+    def test_sorts_by_price(self):
+        response = self.client.get(reverse('index'), {'sort': 'price_desc'})
+        self.assertEqual(self.titles(response), ['Dear', 'Closed', 'Cheap'])
+
+    def test_ending_soon_lists_running_auctions_by_end_date(self):
+        now = timezone.now()
+        Listing.objects.filter(pk=self.dear.pk).update(end_date=now + timedelta(days=2))
+        Listing.objects.filter(pk=self.closed.pk).update(end_date=now - timedelta(days=1))
+        soon = self.create_listing(self.seller, title='Soon', end_date=now + timedelta(hours=1))
+        response = self.client.get(reverse('index'), {'sort': 'ending_soon'})
+        self.assertEqual(self.titles(response), [soon.title, 'Dear'])
+
+    def test_marks_the_listings_the_user_watches(self):
+        user = self.create_user('watcher')
+        user.watchlisted_items.add(self.cheap)
+        for other in range(3):
+            self.create_user(f'other{other}').watchlisted_items.add(self.cheap, self.dear)
+        self.login(user)
+        response = self.client.get(reverse('index'))
+        watched = {listing.title: listing.is_watchlisted for listing in response.context['page_obj']}
+        self.assertEqual(watched, {'Cheap': True, 'Dear': False, 'Closed': False})
+        self.assertContains(response, 'Remove from Watchlist', count=1)
+
+    def test_category_page_defaults_to_active_listings(self):
+        response = self.client.get(reverse('category', args=[self.cheap.category_id]))
+        self.assertCountEqual(self.titles(response), ['Cheap', 'Dear'])
+
+    def test_invalid_field_keeps_the_other_filters(self):
+        response = self.client.get(reverse('category', args=[self.cheap.category_id]),
+                                   {'min_price': 'abc', 'max_price': '100', 'sort': 'price_asc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(response), ['Cheap'])
+
+    def test_invalid_field_falls_back_to_its_initial_value(self):
+        form = ListingFilterForm({'per_page': '7', 'status': 'closed'})
+        self.assertEqual(form.page_size(), ListingFilterForm.PAGE_SIZES[0])
+        self.assertEqual(form.get_value('status'), 'closed')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'query plans are SQLite specific')
+class ListingFeedPlanTests(AuctionsTestCase):
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' | '.join(row[3] for row in cursor.fetchall())
+
+    def test_every_sort_walks_an_index(self):
+        for sort in ListingFilterForm.SORT_ORDERS:
+            for status in ('', 'active'):
+                with self.subTest(sort=sort, status=status):
+                    form = ListingFilterForm({'sort': sort, 'status': status})
+                    plan = self.plan(form.sorted_queryset(Listing.objects.all())[:10])
+                    self.assertIn('USING INDEX listing_feed_', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_category_page_walks_the_category_indexes(self):
+        category = self.create_listing(self.create_user('seller'), starting_price='1.00').category
+        for sort in ('newest', 'price_asc', 'price_desc'):
+            with self.subTest(sort=sort):
+                form = ListingFilterForm({'sort': sort, 'status': 'active'}, fixed_category=category)
+                plan = self.plan(form.sorted_queryset(Listing.objects.all())[:10])
+                self.assertIn('USING INDEX listing_category_', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from auctions import invalidation
+from auctions.invalidation import BID, LISTING, cached, current_versions, local_cache
+from auctions.models import Listing, User
+
+from .base import TEST_CACHES, TEST_STORAGES, AuctionsTestCase
+
+
+class VersionBumpTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.create_user('seller')
+        self.bidder = self.create_user('bidder')
+        self.listing = self.create_listing(self.seller)
+
+    def test_placing_a_bid_bumps_bid_but_not_listing(self):
+        before = current_versions([LISTING, BID])
+        self.login(self.bidder)
+        self.client.post(reverse('place_bid', args=[self.listing.pk]), {'amount': '15.00'})
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.current_price, Decimal('15.00'))
+        self.assertEqual(self.listing.bid_count, 1)
+        listing_version, bid_version = current_versions([LISTING, BID])
+        self.assertEqual(listing_version, before[0])
+        self.assertGreater(bid_version, before[1])
+
+    def test_other_listing_saves_bump_listing(self):
+        before = current_versions([LISTING])
+        self.listing.title = 'Renamed'
+        self.listing.save(update_fields=['title', 'current_price'])
+        self.assertGreater(current_versions([LISTING]), before)
+
+
+@override_settings(STORAGES=TEST_STORAGES, CACHES=TEST_CACHES, TRAFFIC_CAPTURE_PATH=None)
+class LocalCacheTests(TransactionTestCase):
+    def setUp(self):
+        local_cache.clear()
+        self.addCleanup(local_cache.clear)
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return self.builds
+
+    def test_entry_survives_until_its_dependency_changes(self):
+        self.assertEqual(cached('key', [LISTING], self.build), 1)
+        self.assertEqual(cached('key', [LISTING], self.build), 1)
+        invalidation.bump(LISTING)
+        self.assertEqual(cached('key', [LISTING], self.build), 2)
+
+    def test_max_age_expires_an_entry(self):
+        with mock.patch('auctions.invalidation.time.monotonic', return_value=100.0):
+            self.assertEqual(cached('key', [LISTING], self.build, max_age=60), 1)
+        with mock.patch('auctions.invalidation.time.monotonic', return_value=159.0):
+            self.assertEqual(cached('key', [LISTING], self.build, max_age=60), 1)
+        with mock.patch('auctions.invalidation.time.monotonic', return_value=161.0):
+            self.assertEqual(cached('key', [LISTING], self.build, max_age=60), 2)
+
+    def test_facets_follow_bids_after_max_age(self):
+        seller = User.objects.create_user('seller')
+        listing = Listing.objects.create(owner=seller, title='Item', description='d', starting_price=Decimal('10'))
+        with mock.patch('auctions.invalidation.time.monotonic', return_value=100.0):
+            response = self.client.get(reverse('index'))
+        self.assertIn('Under $25', [label for label, *_ in response.context['price_facets']])
+        listing.current_price = Decimal('30')
+        listing.save(update_fields=['current_price', 'bid_count'])
+        with mock.patch('auctions.invalidation.time.monotonic', return_value=100.0 + 61):
+            response = self.client.get(reverse('index'))
+        self.assertEqual([label for label, *_ in response.context['price_facets']], ['$25 - $50'])
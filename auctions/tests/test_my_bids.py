@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.urls import reverse
+
+from auctions.models import Bid, Listing
+from auctions.views import BID_STATUSES
+
+from .base import AuctionsTestCase
+
+
+class MyBidsTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        seller = self.create_user('seller')
+        self.user = self.create_user('me')
+        rival = self.create_user('rival')
+        self.leading, self.outbid, self.won, self.closed = (
+            self.create_listing(seller, title=title) for title in ('Leading', 'Outbid', 'Won', 'Closed')
+        )
+        for listing in (self.leading, self.outbid, self.won, self.closed):
+            Bid.objects.create(user=self.user, listing=listing, amount=Decimal('15'))
+        Bid.objects.create(user=rival, listing=self.outbid, amount=Decimal('20'))
+        # The bid view keeps current_price in step; creating bids directly does not
+        for listing in (self.leading, self.outbid, self.won, self.closed):
+            listing.current_price = listing.get_highest_bid().amount
+            Listing.objects.filter(pk=listing.pk).update(current_price=listing.current_price)
+        self.won.close_auction()
+        # Closed without a recorded winner, e.g. through the admin before winners were set
+        Listing.objects.filter(pk=self.closed.pk).update(is_active=False)
+        self.login(self.user)
+
+    def api(self, **params):
+        return self.client.get(reverse('my_bids_api'), params).json()
+
+    def test_every_reported_status_is_a_declared_filter(self):
+        statuses = {row['title']: row['bid_status'] for row in self.api()['results']}
+        self.assertEqual(statuses, {'Leading': 'leading', 'Outbid': 'outbid', 'Won': 'won', 'Closed': 'closed'})
+        self.assertLessEqual(set(statuses.values()), set(BID_STATUSES))
+
+    def test_status_filters(self):
+        for status in BID_STATUSES:
+            with self.subTest(status=status):
+                titles = [row['title'] for row in self.api(status=status)['results']]
+                self.assertEqual(titles, [status.capitalize()])
+
+    def test_page_renders(self):
+        response = self.client.get(reverse('my_bids'), {'status': 'closed'})
+        self.assertContains(response, 'badge-secondary">Closed')
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError
+from django.urls import reverse
+
+from auctions import idempotency
+from auctions.models import Bid
+
+from .base import AuctionsTestCase
+
+
+class PlaceBidTests(AuctionsTestCase):
+    key = 'a1b2c3d4e5f60718'
+
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listing(self.create_user('seller'))
+        self.bidder = self.create_user('bidder')
+        self.login(self.bidder)
+
+    def bid(self, amount='15.00', key=key):
+        data = {'amount': amount}
+        if key:
+            data['idempotency_key'] = key
+        response = self.client.post(reverse('place_bid', args=[self.listing.pk]), data, follow=True)
+        return [str(message) for message in response.context['messages']]
+
+    def stored_outcome(self):
+        return idempotency.get_cache().get(idempotency.cache_key('bid', self.bidder.pk, self.key))
+
+    def test_repeat_replays_the_first_outcome(self):
+        first = self.bid()
+        self.assertEqual(self.bid(), first)
+        self.assertEqual(first, ['✅ Bid of $15.00 placed successfully!'])
+        self.assertEqual(Bid.objects.count(), 1)
+
+    def test_repeat_is_recognised_after_the_outcome_is_gone(self):
+        self.bid()
+        idempotency.get_cache().clear()
+        self.assertEqual(self.bid(), ['✅ Bid of $15.00 placed successfully!'])
+        self.assertEqual(Bid.objects.count(), 1)
+
+    def test_repeat_while_pending(self):
+        idempotency.claim('bid', self.bidder.pk, self.key)
+        self.assertEqual(self.bid(), ['Your bid is already being processed.'])
+        self.assertEqual(Bid.objects.count(), 0)
+
+    def test_validation_outcome_is_replayed(self):
+        first = self.bid(amount='abc')
+        self.assertEqual(self.bid(amount='20.00'), first)
+        self.assertEqual(Bid.objects.count(), 0)
+
+    def test_unexpected_error_is_not_stored(self):
+        with mock.patch.object(Bid, 'save', side_effect=RuntimeError('database went away')):
+            self.assertEqual(self.bid(), ['Error placing bid: database went away'])
+        self.assertIsNone(self.stored_outcome())
+        self.assertEqual(self.bid(), ['✅ Bid of $15.00 placed successfully!'])
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.current_price, Decimal('15.00'))
+
+    def test_integrity_error_releases_the_key(self):
+        with mock.patch.object(Bid, 'save', side_effect=IntegrityError('constraint failed')):
+            with self.assertRaises(IntegrityError):
+                self.bid()
+        self.assertIsNone(self.stored_outcome())
+
+    def test_unkeyed_unexpected_error_is_shown(self):
+        with mock.patch.object(Bid, 'save', side_effect=RuntimeError('database went away')):
+            self.assertEqual(self.bid(key=None), ['Error placing bid: database went away'])
+
+    def test_duplicate_bid_rows_are_rejected(self):
+        Bid.objects.create(user=self.bidder, listing=self.listing, amount=Decimal('15.00'))
+        with self.assertRaises(IntegrityError):
+            Bid.objects.bulk_create([Bid(user=self.bidder, listing=self.listing, amount=Decimal('15.00'))])
@@ -0,0 +1,29 @@
+from django.urls import reverse
+
+from auctions.models import RequestProfile, User
+
+from .base import AuctionsTestCase
+
+
+class ProfilingMiddlewareTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_listing(self.create_user('seller'))
+
+    def test_staff_request_is_profiled(self):
+        staff = User.objects.create_superuser('staff', 'staff@example.com', self.password)
+        self.login(staff)
+        response = self.client.get(reverse('index'), {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.path, profile.status_code, profile.user), ('/?_profile=1', 200, staff))
+        self.assertGreater(profile.sql_count, 0)
+
+        download = self.client.get(reverse('admin:auctions_requestprofile_folded', args=[profile.pk]))
+        self.assertEqual(download.content.decode(), profile.folded_stacks)
+
+    def test_other_users_are_not_profiled(self):
+        self.login(self.create_user('visitor'))
+        response = self.client.get(reverse('index'), headers={'X-Profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
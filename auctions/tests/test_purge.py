@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.urls import reverse
+
+from auctions.models import Bid, Listing, SimilarListing
+from auctions.purge import purge_deleted_listings
+
+from .base import AuctionsTestCase
+
+
+class SoftDeleteTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.create_user('seller')
+        self.bidder = self.create_user('bidder')
+        self.listing = self.create_listing(self.seller, title='Old lamp')
+        self.kept = self.create_listing(self.seller, title='New lamp')
+        for amount in ('15', '20', '25'):
+            Bid.objects.create(user=self.bidder, listing=self.listing, amount=Decimal(amount))
+        Bid.objects.create(user=self.bidder, listing=self.kept, amount=Decimal('15'))
+        self.listing.watchlist.add(self.bidder)
+        SimilarListing.objects.create(listing=self.kept, similar=self.listing, rank=1, score=0.5)
+
+    def test_delete_view_hides_listing_at_once(self):
+        self.login(self.seller)
+        self.client.post(reverse('delete_listing', args=[self.listing.pk]))
+        self.assertFalse(Listing.objects.filter(pk=self.listing.pk).exists())
+        listing = Listing.all_objects.get(pk=self.listing.pk)
+        self.assertTrue(listing.is_deleted)
+        self.assertFalse(listing.is_active)
+        self.assertEqual(Bid.objects.filter(listing=listing).count(), 3)
+        self.assertEqual(self.client.get(reverse('listing_detail', args=[listing.pk])).status_code, 404)
+        self.assertEqual(list(self.client.get(reverse('index')).context['page_obj']), [self.kept])
+
+    def test_only_the_owner_may_delete(self):
+        self.login(self.bidder)
+        self.client.post(reverse('delete_listing', args=[self.listing.pk]))
+        self.assertTrue(Listing.objects.filter(pk=self.listing.pk).exists())
+
+    def test_purge_removes_rows_in_batches(self):
+        self.listing.soft_delete()
+        listings, rows = purge_deleted_listings(batch_size=2, pause=0)
+        self.assertEqual(listings, 1)
+        self.assertEqual(rows, 3 + 1 + 1 + 1)  # Bids, watchlist row, neighbour entry, listing
+        self.assertFalse(Listing.all_objects.filter(pk=self.listing.pk).exists())
+        self.assertEqual(Bid.objects.count(), 1)
+        self.assertEqual(purge_deleted_listings(pause=0), (0, 0))
@@ -0,0 +1,116 @@
+import multiprocessing
+import tempfile
+
+from django.core.cache import caches
+from django.db import connection
+from django.core.signing import get_cookie_signer
+from django.test import Client, RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from auctions.cache import LockedFileBasedCache
+from auctions.ratelimit import USER_COOKIE, USER_COOKIE_SALT, check_rate_limit, parse_rate, rejected_counts, take_tokens
+
+from .base import AuctionsTestCase
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches.create_connection('default')
+        self.addCleanup(self.cache.clear)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 10 / 60))
+        self.assertEqual(parse_rate('5/10s'), (5, 0.5))
+
+    def test_rejects_once_empty_and_refills_over_time(self):
+        bucket = [('bucket', 2, 1.0)]
+        self.assertEqual(take_tokens(self.cache, bucket, now=100), (0, None))
+        self.assertEqual(take_tokens(self.cache, bucket, now=100), (0, None))
+        wait, empty = take_tokens(self.cache, bucket, now=100)
+        self.assertAlmostEqual(wait, 1.0)
+        self.assertEqual(empty, 0)
+        self.assertEqual(take_tokens(self.cache, bucket, now=101), (0, None))
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = [('bucket', 2, 1.0)]
+        take_tokens(self.cache, bucket, now=0)
+        for _ in range(2):
+            self.assertEqual(take_tokens(self.cache, bucket, now=1000), (0, None))
+        self.assertTrue(take_tokens(self.cache, bucket, now=1000)[0])
+
+    def test_rejection_charges_no_bucket(self):
+        buckets = [('roomy', 10, 1.0), ('tight', 1, 1.0)]
+        take_tokens(self.cache, buckets, now=0)
+        wait, empty = take_tokens(self.cache, buckets, now=0)
+        self.assertEqual(empty, 1)
+        self.assertEqual(self.cache.get('roomy'), (9, 0))
+
+
+def increment_many(directory, times):
+    cache = LockedFileBasedCache(directory, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class LockedFileBasedCacheTests(SimpleTestCase):
+    def test_concurrent_increments_are_not_lost(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LockedFileBasedCache(directory, {})
+            self.assertTrue(cache.add('counter', 0))
+            self.assertFalse(cache.add('counter', 5))
+            context = multiprocessing.get_context('fork')
+            workers = [context.Process(target=increment_many, args=(directory, 50)) for _ in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self.assertEqual(cache.get('counter'), 200)
+
+
+@override_settings(RATE_LIMITS={'bid': {'user': '2/m', 'ip': '100/m'}})
+class RateLimitViewTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bidder = self.create_user('bidder')
+        self.listing = self.create_listing(self.create_user('seller'))
+        self.login(self.bidder)
+
+    def bid(self, amount):
+        return self.client.post(reverse('place_bid', args=[self.listing.pk]), {'amount': amount})
+
+    def test_user_bucket_rejects_with_retry_after(self):
+        self.assertEqual(self.bid('11').status_code, 302)
+        self.assertEqual(self.bid('12').status_code, 302)
+        response = self.bid('13')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(rejected_counts()['bid:user'], 1)
+        self.assertEqual(rejected_counts()['bid:ip'], 0)
+
+    def test_check_runs_no_queries(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        request.COOKIES['sessionid'] = 'abc'
+        request.COOKIES[USER_COOKIE] = get_cookie_signer(salt=USER_COOKIE + USER_COOKIE_SALT).sign(str(self.bidder.pk))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(check_rate_limit(request, 'bid'), 0)
+        self.assertEqual(len(queries), 0)
+
+    def test_sessions_of_one_user_share_a_bucket(self):
+        other_session = Client()
+        other_session.login(username=self.bidder.username, password=self.password)
+        self.assertEqual(self.bid('11').status_code, 302)
+        self.assertEqual(other_session.post(reverse('place_bid', args=[self.listing.pk]), {'amount': '15'}).status_code, 302)
+        self.assertEqual(self.bid('19').status_code, 429)
+
+    def test_dropping_the_user_cookie_keeps_the_bucket(self):
+        self.assertEqual(self.bid('11').status_code, 302)
+        self.assertIn(USER_COOKIE, self.client.cookies)
+        del self.client.cookies[USER_COOKIE]
+        self.assertEqual(self.bid('15').status_code, 302)
+        self.assertEqual(self.bid('19').status_code, 429)
+
+    def test_logout_deletes_the_user_cookie(self):
+        self.bid('11')
+        self.client.get(reverse('logout'))
+        self.assertEqual(self.client.cookies[USER_COOKIE].value, '')
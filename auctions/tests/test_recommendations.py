@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from auctions.models import SimilarListing
+from auctions.recommendations import TopK, rebuild_similar_listings, refresh_similar_listings
+
+from .base import AuctionsTestCase
+
+
+class TopKTests(SimpleTestCase):
+    def test_blockwise_merge_matches_a_full_sort(self):
+        scores = np.random.default_rng(7).random((5, 23)).astype(np.float32)
+        best = TopK(5, 4)
+        for start in range(0, 23, 6):
+            best.add(start, scores[:, start:start + 6])
+        columns, values = best.best()
+        for row in range(5):
+            expected = np.argsort(-scores[row])[:4]
+            np.testing.assert_array_equal(columns[row], expected)
+            np.testing.assert_allclose(values[row], scores[row, expected])
+
+    def test_zero_scores_are_not_neighbours(self):
+        best = TopK(1, 3)
+        best.add(0, np.array([[0.0, 0.5, 0.0]], dtype=np.float32))
+        columns, _ = best.best()
+        np.testing.assert_array_equal(columns[0], [1])
+
+
+class SimilarListingsTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'index.npz')
+        self.seller = self.create_user('seller')
+
+    def neighbours(self, listing):
+        return list(SimilarListing.objects.filter(listing=listing).values_list('similar__title', flat=True))
+
+    def test_column_blocks_do_not_change_results(self):
+        for title in ('Red mountain bike', 'Blue mountain bike', 'Mountain bike helmet', 'Kitchen knife'):
+            self.create_listing(self.seller, title=title)
+        rebuild_similar_listings(column_block_size=1000, path=self.path)
+        whole = list(SimilarListing.objects.values_list('listing_id', 'similar_id', 'rank'))
+        rebuild_similar_listings(column_block_size=1, block_size=2, path=self.path)
+        self.assertEqual(list(SimilarListing.objects.values_list('listing_id', 'similar_id', 'rank')), whole)
+
+    def test_refresh_only_processes_new_listings(self):
+        bike = self.create_listing(self.seller, title='Red mountain bike')
+        self.create_listing(self.seller, title='Kitchen knife')
+        self.assertEqual(refresh_similar_listings(path=self.path), 2)  # No index yet: full build
+        self.assertEqual(refresh_similar_listings(path=self.path), 0)
+
+        other = self.create_listing(self.seller, title='Blue mountain bike')
+        self.assertEqual(refresh_similar_listings(path=self.path), 1)
+        self.assertEqual(self.neighbours(other)[0], 'Red mountain bike')
+        # Spliced into the existing listing's neighbours
+        self.assertEqual(self.neighbours(bike)[0], 'Blue mountain bike')
+        self.assertEqual(refresh_similar_listings(path=self.path), 0)
+
+    def test_deleted_listings_leave_the_index(self):
+        bike = self.create_listing(self.seller, title='Red mountain bike')
+        gone = self.create_listing(self.seller, title='Green mountain bike')
+        refresh_similar_listings(path=self.path)
+        gone.delete()
+        other = self.create_listing(self.seller, title='Blue mountain bike')
+        refresh_similar_listings(path=self.path)
+        self.assertEqual(self.neighbours(other), ['Red mountain bike'])
+        self.assertEqual(self.neighbours(bike), ['Blue mountain bike'])
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from auctions import shill
+from auctions.models import Bid, BidGraphEdge, Listing, ShillScan, ShillSuspect
+from auctions.shill import STALE_SCAN_SECONDS, ScanInProgress, detect_shill_bidding, reset_bid_graph
+
+from .base import AuctionsTestCase
+
+
+class ShillDetectionTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.create_user('seller')
+        self.shill = self.create_user('shill')
+        self.buyer = self.create_user('buyer')
+        self.listings = [self.create_listing(self.seller, title=f'Item {i}', starting_price='100.00') for i in range(4)]
+        # The shill creeps the price up by under 2% and the buyer wins every listing
+        self.place_bids([(self.shill, '101.00'), (self.shill, '101.50'), (self.buyer, '110.00')])
+        Listing.objects.update(winner=self.buyer, is_active=False)
+
+    def place_bids(self, bids):
+        # bulk_create skips the minimum-increment validation in Bid.save()
+        Bid.objects.bulk_create(
+            Bid(user=user, listing=listing, amount=Decimal(amount))
+            for listing in self.listings for user, amount in bids
+        )
+        Bid.objects.update(bid_time=timezone.now() - timedelta(hours=1))
+
+    def test_flags_the_shill_only(self):
+        scan, caught_up = detect_shill_bidding()
+        self.assertTrue(caught_up)
+        self.assertEqual((scan.bids_processed, scan.accounts_flagged, scan.running), (12, 1, False))
+        suspect = ShillSuspect.objects.get()
+        self.assertEqual((suspect.user, suspect.top_seller, suspect.listing_count, suspect.won_count),
+                         (self.shill, self.seller, 4, 0))
+        self.assertEqual(suspect.tiny_increment_share, 1.0)
+        self.assertGreaterEqual(suspect.score, shill.FLAG_THRESHOLD)
+
+    def test_open_suspects_no_longer_flagged_are_cleared(self):
+        reviewed = self.create_user('reviewed')
+        for user, status in ((self.buyer, 'new'), (reviewed, 'cleared')):
+            ShillSuspect.objects.create(
+                user=user, score=0.9, status=status, bid_count=1, listing_count=3, won_count=0,
+                seller_concentration=1, seller_dominance=1, tiny_increment_share=1, reasons='',
+            )
+        detect_shill_bidding()
+        self.assertEqual(
+            dict(ShillSuspect.objects.values_list('user__username', 'status')),
+            {'shill': 'new', 'reviewed': 'cleared'},
+        )
+
+    def test_resumed_runs_match_a_rescan(self):
+        detect_shill_bidding(chunk_size=5)
+        self.place_bids([(self.shill, '111.00')])
+        second, _ = detect_shill_bidding(chunk_size=5)
+        self.assertEqual(second.bids_processed, 4)
+        incremental = set(BidGraphEdge.objects.values_list('bidder', 'seller', 'bid_count', 'listing_count', 'tiny_increment_count'))
+        reset_bid_graph()
+        detect_shill_bidding()
+        self.assertEqual(
+            set(BidGraphEdge.objects.values_list('bidder', 'seller', 'bid_count', 'listing_count', 'tiny_increment_count')),
+            incremental,
+        )
+
+    def test_refuses_to_run_beside_another_scan(self):
+        now = timezone.now()
+        ShillScan.objects.create(last_bid_id=0, started_at=now, finished_at=now, running=True)
+        with self.assertRaises(ScanInProgress):
+            detect_shill_bidding()
+        with self.assertRaises(ScanInProgress):
+            reset_bid_graph()
+        with self.assertRaisesMessage(CommandError, 'Another shill-bidding scan is running.'):
+            call_command('detect_shill_bidding')
+        self.assertEqual(ShillScan.objects.count(), 1)
+        self.assertFalse(BidGraphEdge.objects.exists())
+
+    def test_stale_scan_does_not_block(self):
+        started = timezone.now() - timedelta(seconds=STALE_SCAN_SECONDS + 60)
+        stale = ShillScan.objects.create(last_bid_id=0, started_at=started, finished_at=started, running=True)
+        scan, _ = detect_shill_bidding()
+        stale.refresh_from_db()
+        self.assertFalse(stale.running)
+        self.assertEqual(scan.bids_processed, 12)
+
+    def test_failed_run_releases_the_scan(self):
+        with mock.patch('auctions.shill.score_accounts', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                detect_shill_bidding()
+        self.assertFalse(ShillScan.objects.filter(running=True).exists())
+        scan, _ = detect_shill_bidding()
+        self.assertEqual(scan.accounts_flagged, 1)
@@ -0,0 +1,65 @@
+import gzip
+import os
+import tempfile
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from auctions.middleware import StaticAssetMiddleware, accepted_encodings
+
+
+class AcceptedEncodingsTests(SimpleTestCase):
+    def test_parses_quality_values(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0, br; q=0.5, identity'),
+            {'gzip': 0.0, 'br': 0.5, 'identity': 1.0},
+        )
+
+    def test_malformed_quality_is_refused(self):
+        self.assertEqual(accepted_encodings('gzip;q=abc'), {'gzip': 0.0})
+
+
+class StaticAssetMiddlewareTests(SimpleTestCase):
+    name = 'auctions/app.0123456789ab.js'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, self.name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as source:
+            source.write(b'console.log(1);' * 50)
+        with gzip.open(path + '.gz', 'wb') as compressed:
+            compressed.write(b'console.log(1);' * 50)
+        settings = override_settings(STATIC_ROOT=directory.name, STATIC_URL='/static/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.middleware = StaticAssetMiddleware(lambda request: HttpResponse('fallthrough'))
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        return self.middleware(self.factory.get('/static/' + self.name, headers=headers))
+
+    def test_serves_gzip_sibling_with_its_own_etag(self):
+        identity = self.get()
+        compressed = self.get(accept_encoding='gzip, deflate')
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertTrue(compressed['ETag'].endswith('-gz"'))
+        self.assertNotEqual(identity['ETag'], compressed['ETag'])
+        self.assertIn('immutable', compressed['Cache-Control'])
+
+    def test_zero_quality_refuses_encoding(self):
+        response = self.get(accept_encoding='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_not_modified_only_for_matching_representation(self):
+        etag = self.get(accept_encoding='gzip')['ETag']
+        not_modified = self.get(accept_encoding='gzip', if_none_match=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['Vary'], 'Accept-Encoding')
+        self.assertEqual(self.get(if_none_match=etag).status_code, 200)
+
+    def test_other_paths_fall_through(self):
+        response = self.middleware(self.factory.get('/listings'))
+        self.assertEqual(response.content, b'fallthrough')
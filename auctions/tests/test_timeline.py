@@ -0,0 +1,80 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.urls import reverse
+
+from auctions.models import Bid, Listing
+from auctions.timeline import MAX_POINTS, lttb, min_max
+
+from .base import AuctionsTestCase
+
+
+class DownsamplingTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.x = np.arange(1000, dtype=float)
+        self.y = np.sin(self.x / 50)
+        self.y[437] = 25.0
+        self.y[612] = -25.0
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        keep = lttb(self.x, self.y, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertIn(437, keep)
+        self.assertIn(612, keep)
+
+    def test_min_max_keeps_every_bucket_extreme(self):
+        keep = min_max(self.y, 50)
+        self.assertLessEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertEqual(self.y[keep].max(), self.y.max())
+        self.assertEqual(self.y[keep].min(), self.y.min())
+
+    def test_short_series_is_returned_whole(self):
+        for method in (lambda threshold: lttb(self.x[:10], self.y[:10], threshold),
+                       lambda threshold: min_max(self.y[:10], threshold)):
+            np.testing.assert_array_equal(method(20), np.arange(10))
+            np.testing.assert_array_equal(method(2), np.arange(10))
+
+
+class PriceTimelineApiTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listing(self.create_user('seller'))
+        bidder = self.create_user('bidder')
+        start = self.listing.created_date
+        # bulk_create skips the minimum-increment validation in Bid.save()
+        Bid.objects.bulk_create(
+            Bid(user=bidder, listing=self.listing, amount=Decimal('10') + i, bid_time=start + timedelta(minutes=i + 1))
+            for i in range(1, 301)
+        )
+        Listing.objects.filter(pk=self.listing.pk).update(bid_count=300, current_price=Decimal('310'))
+
+    def get(self, **params):
+        return self.client.get(reverse('price_timeline', args=[self.listing.pk]), params)
+
+    def test_downsamples_to_the_requested_points(self):
+        data = self.get(points=20, method='minmax').json()
+        self.assertEqual((data['method'], data['total']), ('minmax', 301))
+        self.assertLessEqual(len(data['points']), 20)
+        self.assertEqual(data['points'][0][1], 10.0)
+        self.assertEqual(data['points'][-1][1], 310.0)
+        self.assertEqual(data['points'][0][0], int(self.listing.created_date.timestamp() * 1000))
+
+    def test_points_are_clamped(self):
+        self.assertEqual(len(self.get(points=1).json()['points']), 3)
+        self.assertEqual(len(self.get(points=MAX_POINTS * 10).json()['points']), 301)
+        self.assertEqual(len(self.get(points='many').json()['points']), 120)
+
+    def test_rejects_unknown_method(self):
+        self.assertEqual(self.get(method='average').status_code, 400)
+
+    def test_new_bid_starts_a_new_cache_entry(self):
+        self.assertEqual(self.get().json()['total'], 301)
+        Bid.objects.create(user=self.create_user('late'), listing=self.listing, amount=Decimal('320'))
+        Listing.objects.filter(pk=self.listing.pk).update(bid_count=301)
+        self.assertEqual(self.get().json()['total'], 302)
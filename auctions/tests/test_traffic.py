@@ -0,0 +1,75 @@
+import os
+import tempfile
+
+from django.test import LiveServerTestCase, override_settings
+from django.urls import reverse
+
+from auctions.models import Category, Listing, User
+from auctions.traffic import read_trace, replay_traffic, summarize, summarize_trace
+
+from .base import TEST_CACHES, TEST_STORAGES, AuctionsTestCase
+
+
+class CaptureTests(AuctionsTestCase):
+    def test_requests_are_captured_without_private_fields(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            listing = self.create_listing(self.create_user('seller'))
+            self.login(self.create_user('bidder'))
+            with self.settings(TRAFFIC_CAPTURE_PATH=path):
+                self.client.get(reverse('listing_detail', args=[listing.pk]), {'page': '2'})
+                self.client.post(reverse('place_bid', args=[listing.pk]), {'amount': '20', 'note': 'secret'})
+            detail, bid = read_trace(path)
+        self.assertEqual((detail['u'], detail['k'], detail['q'], detail['s']),
+                         ('listing_detail', {'listing_id': listing.pk}, {'page': '2'}, 200))
+        self.assertEqual(bid['p'], {'amount': '20', 'note': ''})
+        self.assertEqual(bid['b'], detail['b'])
+        self.assertGreaterEqual(bid['b'], 0)
+
+
+    def test_admin_requests_keep_their_namespace(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            self.login(User.objects.create_superuser('admin', 'admin@example.com', self.password))
+            with self.settings(TRAFFIC_CAPTURE_PATH=path):
+                self.client.get(reverse('admin:index'))
+                self.client.get(reverse('admin:auctions_listing_changelist'))
+                self.client.get(reverse('index'))
+            records = read_trace(path)
+        self.assertEqual([record['u'] for record in records],
+                         ['admin:index', 'admin:auctions_listing_changelist', 'index'])
+        self.assertEqual(reverse(records[1]['u'], kwargs=records[1]['k'] or None), '/admin/auctions/listing/')
+        self.assertEqual(summarize_trace(records)[0]['url_name'], 'admin:auctions_listing_changelist')
+
+
+class SummaryTests(AuctionsTestCase):
+    def test_rate_limited_and_unsent_requests_are_errors(self):
+        rows = summarize({'index': [5.0, 7.0]}, {'index': {200: 2, 429: 1}, 'gone': {0: 1}}, elapsed=1.0)
+        self.assertEqual([(row['url_name'], row['count'], row['errors']) for row in rows],
+                         [('gone', 1, 1), ('index', 3, 1)])
+
+
+@override_settings(
+    STORAGES=TEST_STORAGES, CACHES=TEST_CACHES, TRAFFIC_CAPTURE_PATH=None,
+    RATE_LIMITS={'bid': {'user': '1/m'}},
+)
+class ReplayTests(LiveServerTestCase):
+    def test_replay_reports_statuses_and_failures(self):
+        seller = User.objects.create_user('seller', 'seller@example.com', 'secret-pass-1')
+        listing = Listing.objects.create(owner=seller, title='Lamp', description='A lamp', starting_price=10,
+                                         category=Category.objects.create(name='Home'))
+        records = [
+            {'t': 1.0, 'u': 'index', 'm': 'GET', 'k': {}, 'q': {}, 'p': {}, 'b': -1, 's': 200, 'd': 1},
+            {'t': 1.1, 'u': 'place_bid', 'm': 'POST', 'k': {'listing_id': listing.pk}, 'q': {}, 'p': {'amount': '20'},
+             'b': 3, 's': 302, 'd': 1},
+            {'t': 1.2, 'u': 'place_bid', 'm': 'POST', 'k': {'listing_id': listing.pk}, 'q': {}, 'p': {'amount': '30'},
+             'b': 3, 's': 302, 'd': 1},
+            {'t': 1.3, 'u': 'no_such_view', 'm': 'GET', 'k': {}, 'q': {}, 'p': {}, 'b': -1, 's': 200, 'd': 1},
+        ]
+        rows, _, failures = replay_traffic(records, self.live_server_url, concurrency=1)
+        rows = {row['url_name']: row for row in rows}
+        self.assertEqual(rows['index']['statuses'], {200: 1})
+        self.assertEqual(rows['place_bid']['statuses'], {302: 1, 429: 1})
+        self.assertEqual(rows['place_bid']['errors'], 1)
+        self.assertEqual(rows['no_such_view']['errors'], 1)
+        self.assertIn('NoReverseMatch', next(iter(failures)))
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from auctions import warmup
+
+from .base import AuctionsTestCase
+
+
+# Closing connections would end the test case's transaction.
+@mock.patch('auctions.warmup.close_connections')
+class WarmUpTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_listing(self.create_user('seller'))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.report_path = os.path.join(directory.name, 'startup.jsonl')
+
+    def test_warm_up_runs_every_step_and_appends_the_report(self, close_connections):
+        with override_settings(STARTUP_REPORT_PATH=self.report_path), self.assertLogs('auctions.startup', 'INFO'):
+            report = warmup.warm_up()
+        self.assertEqual(report['errors'], {})
+        self.assertEqual(list(report['steps']),
+                         ['imports', 'urls', 'database', 'templates', 'render', 'close_connections'])
+        close_connections.assert_called_once_with()
+        self.assertEqual(warmup.read_reports(self.report_path), [json.loads(json.dumps(report))])
+
+    def test_failing_step_is_recorded_not_raised(self, close_connections):
+        with mock.patch('auctions.warmup.render_pages', side_effect=RuntimeError('boom')):
+            with self.assertLogs('auctions.startup', 'ERROR'):
+                report = warmup.warm_up()
+        self.assertEqual(report['errors'], {'render': 'RuntimeError: boom'})
+        self.assertIn('close_connections', report['steps'])
+
+    def test_warm_up_does_not_load_the_test_framework(self, close_connections):
+        with mock.patch.dict(sys.modules, {'django.test': None}), self.assertLogs('auctions.startup', 'INFO'):
+            report = warmup.warm_up()
+        self.assertEqual(report['errors'], {})
+
+    def test_warm_up_can_be_turned_off(self, close_connections):
+        with override_settings(WARMUP_ON_LOAD=False), self.assertLogs('auctions.startup', 'INFO'):
+            report = warmup.warm_up()
+        self.assertEqual(report['steps'], {})
+        close_connections.assert_not_called()
+
+    def test_startup_report_summarizes_a_report_file(self, close_connections):
+        with override_settings(STARTUP_REPORT_PATH=self.report_path), self.assertLogs('auctions.startup', 'INFO'):
+            warmup.warm_up()
+            warmup.warm_up()
+        stdout = StringIO()
+        call_command('startup_report', from_file=self.report_path, stdout=stdout)
+        self.assertIn('2 worker start(s), medians:', stdout.getvalue())
+        self.assertIn('warm-up templates', stdout.getvalue())
+
+
+class ImportTimerTests(AuctionsTestCase):
+    def test_self_time_excludes_nested_imports(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, 'timed_outer.py'), 'w') as module:
+            module.write('import timed_inner\n')
+        with open(os.path.join(directory.name, 'timed_inner.py'), 'w') as module:
+            module.write('import time\ntime.sleep(0.05)\n')
+        sys.path.insert(0, directory.name)
+        self.addCleanup(sys.path.remove, directory.name)
+        self.addCleanup(sys.modules.pop, 'timed_outer', None)
+        self.addCleanup(sys.modules.pop, 'timed_inner', None)
+
+        timer = warmup.ImportTimer.install()
+        try:
+            import timed_outer  # noqa: F401
+        finally:
+            timer.uninstall()
+        records = {name: (cumulative, own) for name, cumulative, own in timer.records}
+        self.assertGreaterEqual(records['timed_inner'][1], 0.05)
+        self.assertGreaterEqual(records['timed_outer'][0], records['timed_inner'][0])
+        self.assertLess(records['timed_outer'][1], 0.05)
+        self.assertEqual(timer.slowest(1)[0][0], 'timed_inner')
+        self.assertNotIn(timer, sys.meta_path)
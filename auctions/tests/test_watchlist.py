@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.urls import reverse
+
+from auctions import views
+
+from .base import AuctionsTestCase
+
+
+class WatchlistTests(AuctionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.create_user('seller')
+        self.user = self.create_user('watcher')
+        self.listings = [self.create_listing(self.seller, title=f'Item {i}') for i in range(5)]
+        self.login(self.user)
+
+    def bulk(self, action, ids):
+        return self.client.post(reverse('bulk_watchlist'), {'action': action, 'listing_ids': ids})
+
+    def test_bulk_add_skips_missing_and_deleted_listings(self):
+        self.listings[1].soft_delete()
+        response = self.bulk('add', [self.listings[0].pk, self.listings[1].pk, 999999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['listing_ids'], [self.listings[0].pk])
+        self.assertEqual(response.json()['watchlist_count'], 1)
+
+    def test_bulk_remove(self):
+        self.user.watchlisted_items.add(*self.listings)
+        response = self.bulk('remove', [listing.pk for listing in self.listings[:3]])
+        self.assertEqual(response.json()['watchlist_count'], 2)
+        self.assertCountEqual(self.user.watchlisted_items.all(), self.listings[3:])
+
+    def test_bulk_rejects_bad_requests(self):
+        self.assertEqual(self.bulk('toggle', [self.listings[0].pk]).status_code, 400)
+        self.assertEqual(self.bulk('add', ['abc']).status_code, 400)
+        with mock.patch.object(views, 'WATCHLIST_BULK_LIMIT', 2):
+            self.assertEqual(self.bulk('add', [listing.pk for listing in self.listings[:3]]).status_code, 400)
+        self.assertEqual(self.user.watchlisted_items.count(), 0)
+
+    def test_watchlist_pages_most_recently_watched_first(self):
+        for listing in self.listings:
+            self.user.watchlisted_items.add(listing)
+        self.listings[4].soft_delete()
+        with mock.patch.object(views, 'WATCHLIST_PAGE_SIZE', 2):
+            first = self.client.get(reverse('watchlist'))
+            last = self.client.get(reverse('watchlist'), {'page': 2})
+        self.assertEqual([item.title for item in first.context['watchlisted_items']], ['Item 3', 'Item 2'])
+        self.assertEqual([item.title for item in last.context['watchlisted_items']], ['Item 1', 'Item 0'])
+        self.assertEqual(first.context['page_obj'].paginator.num_pages, 2)
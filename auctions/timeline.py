@@ -0,0 +1,93 @@
+"""
+Downsampled price timelines for the listing detail chart.
+
+A listing's timeline is its starting price followed by every bid, read in
+one scan of the (listing, bid_time) index. Long histories are reduced on the
+server to the requested number of points with either Largest-Triangle-
+Three-Buckets, which keeps the visual shape, or the minimum and maximum of
+each bucket, which keeps every extreme. Results are cached under the
+listing's bid count, so the next bid on the listing starts a new entry.
+"""
+import numpy as np
+from django.core.cache import cache
+
+from .analytics import to_epoch, to_float
+from .models import Bid
+
+
+METHODS = ('lttb', 'minmax')
+DEFAULT_POINTS = 120
+MIN_POINTS = 3
+MAX_POINTS = 1000
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def lttb(x, y, threshold):
+    """Indices of the ``threshold`` points Largest-Triangle-Three-Buckets keeps."""
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+    # Buckets for the points between the fixed first and last ones
+    bounds = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        if i + 2 < len(bounds):
+            next_start, next_end = bounds[i + 1], bounds[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        # Twice the triangle area; only the argmax matters
+        area = np.abs(
+            (x[a] - average_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(y, threshold):
+    """Indices of each bucket's minimum and maximum, plus the first and last point, in order."""
+    n = len(y)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+    buckets = max(1, (threshold - 2) // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    selected = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            selected.append(start + int(np.argmin(y[start:end])))
+            selected.append(start + int(np.argmax(y[start:end])))
+    return np.unique(selected)
+
+
+def load_timeline(listing):
+    """(epoch seconds, price) arrays: the starting price, then every bid in time order."""
+    rows = Bid.objects.filter(listing_id=listing.pk).order_by('bid_time', 'id').values_list('bid_time', 'amount')
+    times, amounts = [listing.created_date], [listing.starting_price]
+    for bid_time, amount in rows.iterator(chunk_size=5000):
+        times.append(bid_time)
+        amounts.append(amount)
+    return to_epoch(times), to_float(amounts)
+
+
+def price_timeline(listing, points=DEFAULT_POINTS, method='lttb'):
+    """JSON-ready timeline of ``listing`` with at most ``points`` points."""
+    key = f'price_timeline:{listing.pk}:{listing.bid_count}:{method}:{points}'
+    timeline = cache.get(key)
+    if timeline is None:
+        x, y = load_timeline(listing)
+        keep = lttb(x, y, points) if method == 'lttb' else min_max(y, points)
+        timeline = {
+            'listing': listing.pk,
+            'method': method,
+            'total': len(x),
+            # Milliseconds since the epoch, as charting code expects
+            'points': [[int(x[i] * 1000), round(float(y[i]), 2)] for i in keep],
+        }
+        cache.set(key, timeline, CACHE_TIMEOUT)
+    return timeline
@@ -0,0 +1,249 @@
+"""
+Traffic capture and replay for regression benchmarking.
+
+TrafficCaptureMiddleware appends one compact JSON line per request to
+TRAFFIC_CAPTURE_PATH:
+
+    {"t": 1718000000.123, "u": "listing_detail", "m": "GET", "k": {"listing_id": 4},
+     "q": {"page": "2"}, "p": {"amount": "12.00"}, "b": 3, "s": 200, "d": 12.4}
+
+t is the start time, u the view name with its namespace ("admin:index"),
+as reverse() takes it, m the method, k the URL kwargs, q the query string,
+p the POST fields and b the user bucket (-1 for anonymous).
+s is the status code and d the duration in milliseconds. POST values are
+blanked except for the fields in REPLAYABLE_POST_FIELDS, and users are
+reduced to a small number of hashed buckets.
+
+replay_traffic() drives such a trace against a running copy of the app and
+reports throughput and latency percentiles per URL name.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+
+USER_BUCKETS = 32
+REPLAYABLE_POST_FIELDS = frozenset({'amount', 'title', 'description', 'starting_price', 'category', 'name'})
+CSRF_SECRET_LENGTH = 32
+
+
+def user_bucket(user):
+    if not user.is_authenticated:
+        return -1
+    digest = hashlib.blake2b(str(user.pk).encode(), digest_size=4).digest()
+    return int.from_bytes(digest, 'big') % USER_BUCKETS
+
+
+def capture_record(request, response, started, duration):
+    match = request.resolver_match
+    post = {}
+    if request.method == 'POST':
+        for key in request.POST:
+            if key == 'csrfmiddlewaretoken':
+                continue
+            post[key] = request.POST.get(key) if key in REPLAYABLE_POST_FIELDS else ''
+    return {
+        't': round(started, 3),
+        'u': match.view_name if match else None,
+        'm': request.method,
+        'k': match.kwargs if match else {},
+        'q': {key: request.GET.get(key) for key in request.GET},
+        'p': post,
+        'b': user_bucket(request.user),
+        's': response.status_code,
+        'd': round(duration * 1000, 2),
+    }
+
+
+def append_record(path, record):
+    """Append one line; O_APPEND keeps small writes whole across worker processes."""
+    line = (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_trace(path):
+    records = []
+    with open(path) as trace:
+        for line in trace:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                if record.get('u'):
+                    records.append(record)
+    records.sort(key=lambda record: record['t'])
+    return records
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def is_error(status):
+    """Server errors, rate-limit rejections and requests that got no response (0)."""
+    return status == 0 or status == 429 or status >= 500
+
+
+def summarize(durations_by_name, statuses_by_name, elapsed):
+    """Per-URL-name rows of count, errors, requests/s and latency percentiles (ms)."""
+    rows = []
+    for name in sorted(set(durations_by_name) | set(statuses_by_name)):
+        durations = sorted(durations_by_name.get(name, []))
+        statuses = statuses_by_name.get(name, {})
+        count = sum(statuses.values())
+        errors = sum(count for status, count in statuses.items() if is_error(status))
+        rows.append({
+            'url_name': name,
+            'count': count,
+            'errors': errors,
+            'throughput': count / elapsed if elapsed else 0.0,
+            'p50': percentile(durations, 0.50),
+            'p90': percentile(durations, 0.90),
+            'p99': percentile(durations, 0.99),
+            'statuses': dict(statuses),
+        })
+    return rows
+
+
+def summarize_trace(records):
+    """The recorded (production) latencies in the same shape as a replay report."""
+    durations, statuses = defaultdict(list), defaultdict(lambda: defaultdict(int))
+    for record in records:
+        durations[record['u']].append(record['d'])
+        statuses[record['u']][record['s']] += 1
+    elapsed = records[-1]['t'] - records[0]['t'] if len(records) > 1 else 0
+    return summarize(durations, statuses, elapsed)
+
+
+class ReplayClient:
+    """
+    HTTP client for one user bucket. Sessions are created directly in the
+    local session store rather than through the login view, so replaying
+    many buckets does not trip the login rate limit.
+    """
+
+    def __init__(self, base_url, user=None):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(NoRedirect)
+        csrf_secret = get_random_string(CSRF_SECRET_LENGTH)
+        self.csrf_token = csrf_secret
+        cookies = {settings.CSRF_COOKIE_NAME: csrf_secret}
+        if user is not None:
+            cookies[settings.SESSION_COOKIE_NAME] = create_session(user)
+        self.cookie_header = '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+    def open(self, method, path, data=None):
+        url = self.base_url + path
+        headers = {'Referer': self.base_url + '/', 'Cookie': self.cookie_header}
+        body = None
+        if method == 'POST':
+            data = dict(data or {})
+            data['csrfmiddlewaretoken'] = self.csrf_token
+            headers['X-CSRFToken'] = self.csrf_token
+            body = urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(url, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+        except (urllib.error.URLError, OSError):
+            return 0
+
+
+def create_session(user):
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Measure the request itself, not the page a POST redirects to."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def ensure_replay_users(buckets):
+    """Create one local user per recorded bucket. Returns {bucket: user}."""
+    from .models import User
+
+    users = {}
+    for bucket in sorted(buckets):
+        if bucket < 0:
+            continue
+        username = f'replay_user_{bucket}'
+        users[bucket], _ = User.objects.get_or_create(username=username, defaults={'email': f'{username}@example.com'})
+    return users
+
+
+def replay_traffic(records, base_url, concurrency=8, recorded_speed=False, speedup=1.0):
+    """
+    Replay ``records`` against ``base_url``. At recorded speed each request
+    is issued at its original offset (divided by ``speedup``); otherwise the
+    requests are sent as fast as ``concurrency`` workers allow. The server
+    applies its rate limits as usual, and 429s count as errors.
+    Returns (rows, elapsed seconds, Counter of requests that failed to send).
+    """
+    users = ensure_replay_users({record['b'] for record in records})
+    clients = {bucket: ReplayClient(base_url, user) for bucket, user in users.items()}
+    clients[-1] = ReplayClient(base_url)
+
+    durations, statuses = defaultdict(list), defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+
+    def send(record):
+        path = reverse(record['u'], kwargs=record['k'] or None)
+        if record['q']:
+            path += '?' + urllib.parse.urlencode(record['q'])
+        client = clients.get(record['b'], clients[-1])
+        started = time.perf_counter()
+        status = client.open(record['m'], path, record['p'])
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            durations[record['u']].append(elapsed_ms)
+            statuses[record['u']][status] += 1
+
+    first = records[0]['t'] if records else 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for record in records:
+            if recorded_speed:
+                delay = (record['t'] - first) / speedup - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append((record, pool.submit(send, record)))
+        failures = Counter()
+        for record, future in futures:
+            try:
+                future.result()
+            except Exception as error:
+                # The request was never sent (e.g. the URL no longer reverses)
+                statuses[record['u']][0] += 1
+                failures[f"{record['u']}: {type(error).__name__}: {error}"] += 1
+    elapsed = time.perf_counter() - started
+    return summarize(durations, statuses, elapsed), elapsed, failures
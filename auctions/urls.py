@@ -12,10 +12,16 @@ urlpatterns = [
     path("create-listings", views.create_listings, name="create-listings"),
     path("create-category", views.create_category, name="create-category"),
     path("category/<int:category_id>", views.category, name="category"),
+    path("stats", views.market_stats, name="market_stats"),
     path("watchlist", views.view_watchlist, name="watchlist"),
+    path("my-bids", views.my_bids, name="my_bids"),
+    path("api/my-bids", views.my_bids_api, name="my_bids_api"),
     path("watchlist/toggle/<int:listing_id>", views.toggle_watchlist_ajax, name="toggle_watchlist"),
+    path("watchlist/bulk", views.bulk_watchlist, name="bulk_watchlist"),
     path('watchlist/count/', views.watchlist_count, name='watchlist_count'),
+    path('ratelimit/stats/', views.ratelimit_stats, name='ratelimit_stats'),
     path('listing_detail/<int:listing_id>', views.listing_detail, name='listing_detail'),
+    path('api/listings/<int:listing_id>/price-timeline', views.price_timeline_api, name='price_timeline'),
     path('listing/<int:listing_id>/bid/', views.place_bid, name='place_bid'),
     path('listing/<int:listing_id>/close/', views.close_auction, name='close_auction'),
     path('listing/<int:listing_id>/delete/', views.delete_listing, name='delete_listing'),
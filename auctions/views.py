@@ -1,17 +1,26 @@
+import hashlib
+import uuid
 from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
 from django.contrib.auth import authenticate, login, logout
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
 from django.forms import ValidationError
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
-from .models import Bid, Category, Listing
+from .models import Bid, Category, CategoryMarketStats, Listing, SimilarListing
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
-from .forms import BidForm, CategoryForm, ListingForm
+from .forms import BidForm, CategoryForm, ListingFilterForm, ListingForm
+from . import idempotency
+from .ratelimit import rate_limit, rejected_counts
+from .timeline import DEFAULT_POINTS, MAX_POINTS, METHODS, MIN_POINTS, price_timeline
 from django.urls import reverse
+from django.contrib.admin.views.decorators import staff_member_required
+from .invalidation import CATEGORY, LISTING, cached
 
 from .models import User
 
@@ -31,11 +40,12 @@ def create_category(request):
     else:
         form = CategoryForm()
     
-    return render(request, "auctions/create-category.html", {"form": form, "categories": Category.objects.all()})
+    return render(request, "auctions/create-category.html", {"form": form, "categories": _category_list()})
 
+@rate_limit('create_listing')
 def create_listings(request):
     if request.method == "POST":
-        form = ListingForm(request.POST, request.FILES)
+        form = ListingForm(request.POST, request.FILES, categories=_category_list())
         if form.is_valid():
             new_listing = form.save(commit=False)
             new_listing.owner = request.user
@@ -47,10 +57,10 @@ def create_listings(request):
             return render(request, "auctions/create-listings.html", {"form": form})
            
     else:
-        form = ListingForm()
+        form = ListingForm(categories=_category_list())
     return render(request, "auctions/create-listings.html", {
         "form": form,
-        "categories": Category.objects.all()  # Still pass categories for the template
+        "categories": _category_list()  # Still pass categories for the template
     })
 
 @require_POST
@@ -66,8 +76,8 @@ def delete_listing(request, listing_id):
     # Store the title for the success message before deleting
     listing_title = listing.title
     
-    # PERMANENTLY DELETE the listing and all related bids
-    listing.delete()
+    # Hide the listing now; purge_deleted_listings removes it and its bids in small batches
+    listing.soft_delete()
     
     messages.success(request, f'Listing "{listing_title}" has been permanently deleted.')
     return redirect('index')  # Redirect to home page after deletion
@@ -75,17 +85,14 @@ def delete_listing(request, listing_id):
 
 def category(request, category_id):
     category = get_object_or_404(Category, id=category_id)
-    listings = Listing.objects.filter(category=category, is_active=True).order_by('-created_date')
-    
-    paginator = Paginator(listings, 10)  # 10 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    return render(request, "auctions/category.html", {
-        "category": category,
-        "page_obj": page_obj
-    })
+    # The category page has always shown active listings unless asked otherwise
+    data = request.GET.copy()
+    data.setdefault('status', 'active')
+    context = _listing_feed(data, request.user, fixed_category=category)
+    context["category"] = category
+    return render(request, "auctions/category.html", context)
 
+@rate_limit('login')
 def login_view(request):
     if request.method == "POST":
 
@@ -150,35 +157,144 @@ def register(request):
 #     return redirect('index')
 
 
+WATCHLIST_PAGE_SIZE = 20
+WATCHLIST_BULK_LIMIT = 500
+
+
 def view_watchlist(request):
-    user = request.user
-    watchlisted_items = user.watchlisted_items.all()
+    page_obj = None
+    if request.user.is_authenticated:
+        # One joined query per page over the M2M rows, most recently watched first
+        entries = Listing.watchlist.through.objects.filter(
+            user=request.user, listing__is_deleted=False,
+        ).select_related('listing__owner', 'listing__category').order_by('-id')
+        paginator = Paginator(entries, WATCHLIST_PAGE_SIZE)
+        page_obj = paginator.get_page(request.GET.get('page'))
     return render(request, "auctions/watchlist.html", {
-        "watchlisted_items": watchlisted_items
+        "page_obj": page_obj,
+        "watchlisted_items": [entry.listing for entry in page_obj] if page_obj else [],
     })
 
 
-
-def index(request):
-    owner = request.user
-    all_listings = Listing.objects.all().order_by('-created_date')  # Use appropriate field
+@rate_limit('watchlist')
+@require_POST
+@login_required
+def bulk_watchlist(request):
+    action = request.POST.get('action')
+    if action not in ('add', 'remove'):
+        return JsonResponse({'status': 'error', 'message': 'Action must be "add" or "remove".'}, status=400)
+    try:
+        listing_ids = {int(value) for value in request.POST.getlist('listing_ids')}
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Listing ids must be integers.'}, status=400)
+    if len(listing_ids) > WATCHLIST_BULK_LIMIT:
+        return JsonResponse({'status': 'error', 'message': f'At most {WATCHLIST_BULK_LIMIT} listings at a time.'}, status=400)
     
-    paginator = Paginator(all_listings, 10)  # 10 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    watchlist = request.user.watchlisted_items
+    if action == 'add':
+        # Ignore ids of listings that do not exist (or are deleted)
+        listing_ids = list(Listing.objects.filter(pk__in=listing_ids).values_list('pk', flat=True))
+        watchlist.add(*listing_ids)  # One INSERT for the missing rows
+    else:
+        watchlist.remove(*listing_ids)  # One DELETE
     
-    return render(request, "auctions/index.html", {
-        'owner': owner, 
-        'page_obj': page_obj
+    return JsonResponse({
+        'status': 'success',
+        'action': action,
+        'listing_ids': sorted(listing_ids),
+        'watchlist_count': watchlist.count(),
     })
 
+
+
+# Upper bound on how long cached facet counts lag behind bids
+FACET_MAX_AGE = 60
+
+
+def _category_list():
+    """All categories by name, cached in-process until a category changes."""
+    return cached('categories', [CATEGORY], lambda: list(Category.objects.order_by('name')))
+
+
+def _listing_facets(filter_form, listings):
+    """
+    Category and price-bucket counts from one aggregate query, cached per
+    filter set until a listing or category changes. Bids move listings between
+    price buckets without bumping "listing", so entries also expire after
+    FACET_MAX_AGE seconds.
+    """
+    key_data = sorted(
+        (name, value) for name, value in filter_form.data.items()
+        if name not in ('page', 'sort', 'per_page')
+    )
+    cache_key = 'listing_facets:%s:%s' % (
+        filter_form.fixed_category.pk if filter_form.fixed_category else '',
+        hashlib.md5(urlencode(key_data).encode()).hexdigest(),
+    )
+    base = filter_form.filter_queryset(listings, with_facets=False)
+    return cached(cache_key, [LISTING, CATEGORY], lambda: base.aggregate(**filter_form.facet_aggregates()),
+                  max_age=FACET_MAX_AGE)
+
+
+def _facet_link(params, **values):
+    params = params.copy()
+    for name, value in values.items():
+        params[name] = '' if value is None else str(value)
+    return params.urlencode()
+
+
+def _listing_feed(data, user, fixed_category=None):
+    categories = _category_list()
+    filter_form = ListingFilterForm(data, fixed_category=fixed_category, categories=categories)
+    listings = Listing.objects.select_related('owner', 'category', 'winner')
+    if user.is_authenticated:
+        # Only whether this user watches each listing, not every watcher's row
+        listings = listings.annotate(is_watchlisted=Exists(
+            Listing.watchlist.through.objects.filter(listing=OuterRef('pk'), user=user)
+        ))
+    paginator = Paginator(filter_form.sorted_queryset(listings), filter_form.page_size())
+    page_obj = paginator.get_page(data.get('page'))
+    
+    # Query string without the page number, for pagination and facet links
+    params = data.copy()
+    params.pop('page', None)
+    counts = _listing_facets(filter_form, Listing.objects.all())
+    category_facets = []
+    if fixed_category is None:
+        for facet_category in categories:
+            count = counts.get(f'category_{facet_category.pk}', 0)
+            if count:
+                category_facets.append((facet_category.name, count, _facet_link(params, category=facet_category.pk)))
+    price_facets = []
+    for index, (label, low, high) in enumerate(filter_form.PRICE_BUCKETS):
+        count = counts.get(f'price_{index}', 0)
+        if count:
+            # Buckets exclude their upper bound; max_price is inclusive
+            high = high - Decimal('0.01') if high is not None else None
+            price_facets.append((label, count, _facet_link(params, min_price=low, max_price=high)))
+    
+    return {
+        "filter_form": filter_form,
+        "page_obj": page_obj,
+        "querystring": params.urlencode(),
+        "category_facets": category_facets,
+        "price_facets": price_facets,
+    }
+
+
+def index(request):
+    context = _listing_feed(request.GET, request.user)
+    context['owner'] = request.user
+    return render(request, "auctions/index.html", context)
+
+@rate_limit('watchlist')
 @require_POST
 @login_required
 def toggle_watchlist_ajax(request, listing_id):
     listing = get_object_or_404(Listing, id=listing_id)
     
     
-    if request.user in listing.watchlist.all():
+    if listing.watchlist.filter(pk=request.user.pk).exists():
         listing.watchlist.remove(request.user)
         is_watchlisted = False
         message = f'Removed "{listing.title}" from your watchlist.'
@@ -201,6 +317,13 @@ def watchlist_count(request):
     return JsonResponse({
         'count': count
     })
+
+
+@staff_member_required
+def ratelimit_stats(request):
+    return JsonResponse({
+        'rejected': rejected_counts()
+    })
     
     
     
@@ -214,74 +337,147 @@ def listing_detail(request, listing_id):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Precomputed by the build_similar_listings command
+    similar_listings = [
+        entry.similar
+        for entry in SimilarListing.objects.filter(listing=listing, similar__is_deleted=False).select_related('similar')
+    ]
+    
     return render(request, "auctions/listing_detail.html", {
         "listing": listing,
+        "idempotency_key": uuid.uuid4().hex,  # Lets place_bid recognise repeated submissions
         "is_watchlisted": is_watchlisted,
         'page_obj': page_obj,
+        'similar_listings': similar_listings,
         'bids': bids  # Also pass the full queryset if needed
     })
     
 
-@login_required
-def place_bid(request, listing_id):
+def price_timeline_api(request, listing_id):
+    listing = get_object_or_404(
+        Listing.objects.only('id', 'bid_count', 'created_date', 'starting_price'), id=listing_id,
+    )
+    method = request.GET.get('method', 'lttb')
+    if method not in METHODS:
+        return JsonResponse({'error': f'method must be one of {", ".join(METHODS)}'}, status=400)
+    try:
+        points = min(max(int(request.GET.get('points', DEFAULT_POINTS)), MIN_POINTS), MAX_POINTS)
+    except ValueError:
+        points = DEFAULT_POINTS
+    return JsonResponse(price_timeline(listing, points, method))
+
+
+class BidFailed(Exception):
+    """An unexpected error while placing a bid. Its outcome is shown but never stored, so a retry runs again."""
+
+    def __init__(self, outcome):
+        super().__init__(outcome)
+        self.outcome = outcome
+
+
+def _placed_bid_outcome(user, key):
+    """The outcome of a bid already stored under ``key``, or None."""
+    bid = Bid.objects.filter(user=user, idempotency_key=key).only('amount').first()
+    if bid is None:
+        return None
+    return [(messages.SUCCESS, f'✅ Bid of ${bid.amount:.2f} placed successfully!')]
+
+
+def _submit_bid(request, listing_id, key=None):
+    """Validate and place a bid. Returns the outcome as a list of (message level, text)."""
     listing = get_object_or_404(Listing, id=listing_id)
+    amount_str = request.POST.get('amount', '').strip()
     
-    if request.method == "POST":
-        amount_str = request.POST.get('amount', '').strip()
+    try:
+        amount = Decimal(amount_str)
+        
+        # Basic validation
+        if amount <= 0:
+            return [(messages.ERROR, "Bid amount must be greater than 0.")]
+        
+        if request.user == listing.owner:
+            return [(messages.ERROR, "You cannot bid on your own listing.")]
+        
+        if not listing.is_active:
+            return [(messages.ERROR, "This auction is no longer active.")]
+        
+        # Use the same safe pattern as the model
+        current_price = listing.current_price
+        if current_price is None:
+            current_price = listing.starting_price
+        
+        if amount <= current_price:
+            return [(messages.ERROR, f"Bid must be higher than the current price of ${current_price:.2f}.")]
+        
+        # Create and validate the bid
+        bid = Bid(
+            user=request.user,
+            listing=listing,
+            amount=amount,
+            idempotency_key=key,
+        )
         
         try:
-            amount = Decimal(amount_str)
-            
-            # Basic validation
-            if amount <= 0:
-                messages.error(request, "Bid amount must be greater than 0.")
-                return redirect('listing_detail', listing_id=listing.id)
-            
-            if request.user == listing.owner:
-                messages.error(request, "You cannot bid on your own listing.")
-                return redirect('listing_detail', listing_id=listing.id)
-            
-            if not listing.is_active:
-                messages.error(request, "This auction is no longer active.")
-                return redirect('listing_detail', listing_id=listing.id)
-            
-            # Use the same safe pattern as the model
-            current_price = listing.current_price
-            if current_price is None:
-                current_price = listing.starting_price
-            
-            if amount <= current_price:
-                messages.error(request, f"Bid must be higher than the current price of ${current_price:.2f}.")
-                return redirect('listing_detail', listing_id=listing.id)
-            
-            # Create and validate the bid
-            bid = Bid(
-                user=request.user,
-                listing=listing,
-                amount=amount
-            )
-            
-            try:
-                bid.full_clean()  # This will use your fixed validation
+            bid.full_clean()  # This will use your fixed validation
+            # One transaction, so the cache version bumps commit with the writes
+            with transaction.atomic():
                 bid.save()
                 
-                # Update listing current price
+                # Update listing current price and the denormalized bid count
                 listing.current_price = amount
-                listing.save()
-                
-                messages.success(request, f'✅ Bid of ${amount:.2f} placed successfully!')
-                
-            except ValidationError as e:
-                # Handle model validation errors
-                for error in e.messages:
-                    messages.error(request, error)
+                listing.bid_count = F('bid_count') + 1
+                listing.save(update_fields=['current_price', 'bid_count'])
             
-        except InvalidOperation:
-            messages.error(request, "Invalid bid amount. Please enter a valid number.")
-        except Exception as e:
-            messages.error(request, f"Error placing bid: {str(e)}")
+            return [(messages.SUCCESS, f'✅ Bid of ${amount:.2f} placed successfully!')]
+        
+        except (ValidationError, IntegrityError) as e:
+            # A concurrent repeat of this submission that won the race shows up
+            # as the key's unique constraint failing, in validation or on insert
+            outcome = _placed_bid_outcome(request.user, key) if key else None
+            if outcome is not None:
+                return outcome
+            if isinstance(e, IntegrityError):
+                raise
+            # Handle model validation errors
+            return [(messages.ERROR, error) for error in e.messages]
     
-    return redirect('listing_detail', listing_id=listing.id)
+    except InvalidOperation:
+        return [(messages.ERROR, "Invalid bid amount. Please enter a valid number.")]
+    except IntegrityError:
+        raise
+    except Exception as e:
+        raise BidFailed([(messages.ERROR, f"Error placing bid: {str(e)}")]) from e
+
+
+@rate_limit('bid')
+@login_required
+def place_bid(request, listing_id):
+    if request.method != "POST":
+        get_object_or_404(Listing, id=listing_id)
+        return redirect('listing_detail', listing_id=listing_id)
+    
+    # Repeats of a keyed submission replay the first outcome without writing anything
+    key = idempotency.clean_key(request.POST.get('idempotency_key'))
+    try:
+        if key is None:
+            outcome = _submit_bid(request, listing_id)
+        else:
+            outcome = idempotency.claim('bid', request.user.pk, key)
+            if outcome == idempotency.PENDING:
+                outcome = [(messages.INFO, "Your bid is already being processed.")]
+            elif outcome is None:
+                try:
+                    outcome = _placed_bid_outcome(request.user, key) or _submit_bid(request, listing_id, key)
+                except Exception:
+                    idempotency.release('bid', request.user.pk, key)
+                    raise
+                idempotency.store('bid', request.user.pk, key, outcome)
+    except BidFailed as error:
+        outcome = error.outcome
+    
+    for level, text in outcome:
+        messages.add_message(request, level, text)
+    return redirect('listing_detail', listing_id=listing_id)
 
 @login_required
 def close_auction(request, listing_id):
@@ -298,4 +494,66 @@ def close_auction(request, listing_id):
     else:
         messages.info(request, "Auction closed with no bids.")
     
-    return redirect('listing_detail', listing_id=listing.id)
\ No newline at end of file
+    return redirect('listing_detail', listing_id=listing.id)
+
+
+def market_stats(request):
+    stats = CategoryMarketStats.objects.select_related('category').order_by('category__name')
+    return render(request, "auctions/market-stats.html", {
+        "stats": stats
+    })
+
+
+BID_STATUSES = ("leading", "outbid", "won", "closed")
+
+
+def _my_bids_page(request, per_page=10):
+    status = request.GET.get('status')
+    if status not in BID_STATUSES:
+        status = None
+    listings = Listing.objects.bid_on_by(request.user, status)
+    paginator = Paginator(listings, per_page)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    for listing in page_obj:
+        listing.my_status = listing.bid_status_for(request.user)
+    return page_obj, status
+
+
+@login_required
+def my_bids(request):
+    page_obj, status = _my_bids_page(request)
+    return render(request, "auctions/my-bids.html", {
+        "page_obj": page_obj,
+        "status": status,
+        "statuses": BID_STATUSES,
+    })
+
+
+@login_required
+def my_bids_api(request):
+    try:
+        per_page = min(max(int(request.GET.get('page_size', 10)), 1), 50)
+    except ValueError:
+        per_page = 10
+    page_obj, status = _my_bids_page(request, per_page)
+    return JsonResponse({
+        'status': status,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'count': page_obj.paginator.count,
+        'results': [
+            {
+                'listing_id': listing.id,
+                'title': listing.title,
+                'url': reverse('listing_detail', args=[listing.id]),
+                'category': listing.category.name if listing.category else None,
+                'current_price': f"{listing.get_current_price():.2f}",
+                'my_top_bid': f"{listing.my_top_bid:.2f}",
+                'my_bid_count': listing.my_bid_count,
+                'my_last_bid': listing.my_last_bid.isoformat(),
+                'is_active': listing.is_active,
+                'bid_status': listing.my_status,
+            }
+            for listing in page_obj
+        ],
+    })
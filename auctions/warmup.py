@@ -0,0 +1,252 @@
+"""
+Worker warm-up and startup-time reporting.
+
+commerce/wsgi.py and asgi.py install an ImportTimer before importing Django
+and call warm_up() once the application is loaded. Warm-up does the work a
+fresh worker would otherwise do inside its first requests: import the
+lazily loaded modules, compile every URL pattern, compile all app templates
+into the cached template loader (Django wraps the configured loaders in it
+by default), render the main pages once, run a query on each database
+connection and prime the in-process caches.
+
+Connections are closed again at the end. With CONN_MAX_AGE = 0 the first
+request would close them anyway, and a preloading server (gunicorn
+--preload) must not share open connections across the fork.
+
+The startup report is logged to the "auctions.startup" logger and, when
+STARTUP_REPORT_PATH is set, appended as one JSON line per worker start.
+``manage.py startup_report`` measures a cold start in a fresh interpreter.
+No step is allowed to stop a worker from starting; failures are recorded
+in the report instead.
+"""
+import importlib.machinery
+import json
+import logging
+import os
+import sys
+import time
+
+
+logger = logging.getLogger('auctions.startup')
+
+REPORT_MODULES = 40
+WARMUP_MODULES = (
+    'auctions.views',
+    'auctions.forms',
+    'auctions.admin',
+    'auctions.profiling',
+    'auctions.invalidation',
+    'django.contrib.admin.views.main',
+    'django.contrib.auth.forms',
+)
+# Only these loaders are created per module, so patching the instance is safe.
+TIMED_LOADERS = (importlib.machinery.SourceFileLoader, importlib.machinery.SourcelessFileLoader,
+                 importlib.machinery.ExtensionFileLoader)
+
+
+class ImportTimer:
+    """
+    Meta path finder that times every module executed while it is installed.
+    Records (module, cumulative seconds, self seconds); self time excludes
+    the modules imported from inside that module.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = []
+        self.stack = []
+
+    @classmethod
+    def install(cls):
+        timer = cls()
+        sys.meta_path.insert(0, timer)
+        return timer
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if isinstance(spec.loader, TIMED_LOADERS):
+                    self.wrap(spec.loader, fullname)
+                return spec
+        return None
+
+    def wrap(self, loader, fullname):
+        execute = loader.exec_module
+
+        def exec_module(module):
+            started = time.perf_counter()
+            self.stack.append(0.0)
+            try:
+                execute(module)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = self.stack.pop()
+                if self.stack:
+                    self.stack[-1] += elapsed
+                self.records.append((fullname, elapsed, elapsed - children))
+
+        loader.exec_module = exec_module
+
+    def total(self):
+        """Seconds spent executing modules (the self times add up to the top-level imports)."""
+        return sum(own for _, _, own in self.records)
+
+    def slowest(self, limit=REPORT_MODULES):
+        return sorted(self.records, key=lambda record: -record[2])[:limit]
+
+
+class Steps:
+    """Times named warm-up steps; a failing step is recorded, never raised."""
+
+    def __init__(self):
+        self.timings = {}
+        self.errors = {}
+
+    def run(self, name, function):
+        started = time.perf_counter()
+        try:
+            function()
+        except Exception as error:
+            self.errors[name] = f"{type(error).__name__}: {error}"
+            logger.exception("Warm-up step %s failed", name)
+        self.timings[name] = time.perf_counter() - started
+
+
+def import_modules():
+    for name in WARMUP_MODULES:
+        __import__(name)
+
+
+def compile_urls():
+    from django.urls import URLResolver, get_resolver
+
+    def walk(patterns):
+        for pattern in patterns:
+            pattern.pattern.regex  # Compiled lazily on first access
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+
+    resolver = get_resolver()
+    walk(resolver.url_patterns)
+    resolver.reverse_dict  # Populates the reverse lookup tables
+    resolver.resolve('/')
+
+
+def app_template_names(app_label='auctions'):
+    from django.apps import apps
+
+    root = os.path.join(apps.get_app_config(app_label).path, 'templates')
+    names = []
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith('.html'):
+                names.append(os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def compile_templates():
+    from django.template.loader import get_template
+
+    for name in app_template_names():
+        get_template(name)
+
+
+def render_pages():
+    """Render the main pages once through their views; this also primes the local caches."""
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import HttpRequest
+
+    from . import views
+    from .models import Category, Listing
+
+    def get(view, path, *args):
+        # A bare request: django.test would pull the test framework into every worker
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = request.path_info = path
+        request.META = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80'}
+        request.user = AnonymousUser()
+        view(request, *args)
+
+    get(views.index, '/')
+    category = Category.objects.order_by('pk').first()
+    if category is not None:
+        get(views.category, '/category', category.pk)
+    listing = Listing.objects.order_by('-pk').first()
+    if listing is not None:
+        get(views.listing_detail, '/listing_detail', listing.pk)
+    get(views.market_stats, '/stats')
+
+
+def touch_connections():
+    from django.db import connections
+
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def close_connections():
+    from django.db import connections
+
+    connections.close_all()
+
+
+def warm_up(import_timer=None):
+    """Warm the current process up and emit its startup report. Returns the report."""
+    from django.conf import settings
+
+    steps = Steps()
+    if getattr(settings, 'WARMUP_ON_LOAD', True):
+        steps.run('imports', import_modules)
+        steps.run('urls', compile_urls)
+        steps.run('database', touch_connections)
+        steps.run('templates', compile_templates)
+        steps.run('render', render_pages)
+        steps.run('close_connections', close_connections)
+    if import_timer is not None:
+        import_timer.uninstall()
+
+    report = startup_report(import_timer, steps)
+    logger.info(
+        "Worker %s started in %.0f ms (imports %.0f ms, warm-up %.0f ms)",
+        report['pid'], report['startup_ms'], report['imports_ms'], report['warmup_ms'],
+    )
+    path = getattr(settings, 'STARTUP_REPORT_PATH', None)
+    if path:
+        from .traffic import append_record
+        try:
+            append_record(path, report)
+        except OSError:
+            logger.exception("Cannot write the startup report to %s", path)
+    return report
+
+
+def startup_report(import_timer, steps):
+    started = import_timer.started if import_timer is not None else None
+    return {
+        't': round(time.time(), 3),
+        'pid': os.getpid(),
+        'python': sys.version.split()[0],
+        'startup_ms': round((time.perf_counter() - started) * 1000, 2) if started else 0.0,
+        'imports_ms': round(import_timer.total() * 1000, 2) if import_timer else 0.0,
+        'warmup_ms': round(sum(steps.timings.values()) * 1000, 2),
+        'steps': {name: round(seconds * 1000, 2) for name, seconds in steps.timings.items()},
+        'errors': steps.errors,
+        'modules': [
+            [name, round(cumulative * 1000, 3), round(own * 1000, 3)]
+            for name, cumulative, own in (import_timer.slowest() if import_timer else [])
+        ],
+    }
+
+
+def read_reports(path):
+    with open(path) as reports:
+        return [json.loads(line) for line in reports if line.strip()]
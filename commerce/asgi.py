@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from auctions.warmup import ImportTimer, warm_up
+
+# Installed first so the startup report covers Django's own imports too.
+import_timer = ImportTimer.install()
+
+from django.core.asgi import get_asgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commerce.settings')
 
 application = get_asgi_application()
+warm_up(import_timer)
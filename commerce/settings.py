@@ -42,10 +42,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'auctions.middleware.StaticAssetMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    'auctions.middleware.CacheVersionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'auctions.middleware.RateLimitUserMiddleware',
+    'auctions.middleware.TrafficCaptureMiddleware',
+    'auctions.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,9 +89,57 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'auctions.User'
 
+# "default" is per-process. The file caches live on disk, so every worker
+# process sees the same entries, and LockedFileBasedCache makes updates to
+# them atomic across processes (auctions/cache.py). Rate-limit buckets get
+# their own cache sized well above the number of clients active within a
+# minute, so culling never refills a live bucket.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'auctions.cache.LockedFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'shared'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'ratelimit': {
+        'BACKEND': 'auctions.cache.LockedFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'ratelimit'),
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'CULL_FREQUENCY': 10},
+    },
+}
+
+# Token buckets guarding the write paths. The limits are defined in
+# auctions/ratelimit.py; set RATE_LIMITS to replace them.
+RATE_LIMIT_CACHE = 'ratelimit'
+
+# Outcomes of bid submissions by idempotency key, see auctions/idempotency.py.
+IDEMPOTENCY_CACHE = 'shared'
+
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# TF-IDF vectors kept between build_similar_listings runs (auctions/recommendations.py).
+SIMILAR_LISTINGS_INDEX_PATH = os.path.join(BASE_DIR, 'cache', 'similar-listings.npz')
+# Set to a file path to record anonymized request shapes for replay_traffic.
+TRAFFIC_CAPTURE_PATH = os.environ.get('TRAFFIC_CAPTURE_PATH')
+# commerce/wsgi.py and asgi.py warm each worker up at load (auctions/warmup.py);
+# set STARTUP_REPORT_PATH to append one startup-time report per worker start.
+WARMUP_ON_LOAD = os.environ.get('WARMUP_ON_LOAD', '1') != '0'
+STARTUP_REPORT_PATH = os.environ.get('STARTUP_REPORT_PATH')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'auctions.startup': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -123,3 +177,15 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic fingerprints every asset and writes .gz/.br siblings so the
+# StaticAssetMiddleware can serve them with far-future cache headers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'auctions.storage.CompressedManifestStaticFilesStorage',
+    },
+}
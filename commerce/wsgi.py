@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+from auctions.warmup import ImportTimer, warm_up
+
+# Installed first so the startup report covers Django's own imports too.
+import_timer = ImportTimer.install()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commerce.settings')
 
 application = get_wsgi_application()
+warm_up(import_timer)